@@ -0,0 +1,48 @@
+# app/core/config_reconcile.py
+
+
+def _devices_by_name(devices: list[dict]) -> dict[str, dict]:
+    return {d.get("name"): d for d in devices}
+
+
+def diff_devices(old: list[dict], new: list[dict]) -> dict:
+    """Device names added, removed and changed (same name, different config)."""
+    old_by_name = _devices_by_name(old)
+    new_by_name = _devices_by_name(new)
+    return {
+        "added": sorted(n for n in new_by_name if n not in old_by_name),
+        "removed": sorted(n for n in old_by_name if n not in new_by_name),
+        "updated": sorted(
+            n for n in new_by_name if n in old_by_name and new_by_name[n] != old_by_name[n]
+        ),
+    }
+
+
+def plan_reconciliation(running: dict, config: list[dict]) -> dict:
+    """
+    Compare the running rooms (room ID -> RoomKNX) with a new room config.
+    Rooms whose gateway (ip or connection_type) changed are reconnected;
+    rooms on the same gateway only get their changed devices swapped.
+    """
+    wanted = {str(cfg["room_id"]): cfg for cfg in config}
+
+    plan = {"add": [], "remove": [], "reconnect": [], "devices": {}, "unchanged": []}
+    for room_id in running:
+        if room_id not in wanted:
+            plan["remove"].append(room_id)
+
+    for room_id, cfg in wanted.items():
+        room = running.get(room_id)
+        if room is None:
+            plan["add"].append(room_id)
+            continue
+        if cfg["ip"] != room.ip or cfg.get("connection_type") != room.connection_type:
+            plan["reconnect"].append(room_id)
+            continue
+        changes = diff_devices(room.devices_config, cfg["devices"])
+        if any(changes.values()):
+            plan["devices"][room_id] = changes
+        else:
+            plan["unchanged"].append(room_id)
+
+    return plan
@@ -0,0 +1,390 @@
+# app/core/control_protocol.py
+import asyncio
+import os
+import time
+from collections import deque
+
+import orjson
+from xknx.telegram import Telegram, TelegramDirection
+from xknx.telegram.apci import GroupValueRead, GroupValueWrite
+
+from app.core.read_scheduler import READ_PRIORITY_USER
+from app.core.serialization import dumps_text, orjson_default
+
+try:
+    import msgpack
+except ImportError:  # binary framing is optional
+    msgpack = None
+
+# How long an ack waits for the telegram to be confirmed by the interface
+CONTROL_BUS_ACK_TIMEOUT_MS = float(os.getenv("CONTROL_BUS_ACK_TIMEOUT_MS", "1000"))
+CONTROL_MAX_BATCH = int(os.getenv("CONTROL_MAX_BATCH", "200"))
+# Acks waiting for a slow client; beyond this the socket stops reading new commands
+CONTROL_OUTBOX_SIZE = int(os.getenv("CONTROL_OUTBOX_SIZE", "1000"))
+
+# Actions a control client may call, per device type. Everything can be re-read with "sync".
+CONTROL_ACTIONS = {
+    "Light": {
+        "set_on", "set_off", "set_brightness", "set_color", "set_color_temperature",
+        "set_hs_color", "set_tunable_white", "set_xyy_color",
+    },
+    "Switch": {"set_on", "set_off"},
+    "Cover": {
+        "set_up", "set_down", "set_short_up", "set_short_down", "stop", "set_position", "set_angle",
+    },
+    "Climate": {
+        "set_target_temperature", "set_setpoint_shift", "turn_on", "turn_off",
+        "set_fan_speed", "set_swing", "set_horizontal_swing",
+    },
+    "Fan": {"turn_on", "turn_off", "set_speed", "set_oscillation"},
+    "NumericValue": {"set"},
+    "RawValue": {"set"},
+    "Notification": {"set"},
+    "ExposeSensor": {"set"},
+    "Scene": {"run"},
+}
+COMMON_ACTIONS = {"sync"}
+
+# Actions that set a value where only the last one matters (slider drags).
+# A queued one may be replaced by a newer one; everything else always runs.
+SUPERSEDABLE_ACTIONS = {
+    "Light": {
+        "set_brightness", "set_color", "set_color_temperature", "set_hs_color",
+        "set_tunable_white", "set_xyy_color",
+    },
+    "Cover": {"set_position", "set_angle"},
+    "Climate": {"set_target_temperature", "set_setpoint_shift", "set_fan_speed"},
+    "Fan": {"set_speed"},
+    "NumericValue": {"set"},
+    "RawValue": {"set"},
+    "ExposeSensor": {"set"},
+}
+
+# Remote values an action writes to, for matching its telegram. Actions not
+# listed here (or whose remote values have no address) match every
+# address the device writes to.
+CONTROL_ACTION_WRITES = {
+    "Light": {
+        "set_on": ("switch",), "set_off": ("switch",), "set_brightness": ("brightness",),
+        "set_color": ("color", "rgbw"), "set_hs_color": ("hue", "saturation"),
+        "set_xyy_color": ("xyy_color",), "set_tunable_white": ("tunable_white",),
+        "set_color_temperature": ("color_temperature",),
+    },
+    "Switch": {"set_on": ("switch",), "set_off": ("switch",)},
+    "Cover": {
+        "set_up": ("updown",), "set_down": ("updown",), "set_short_up": ("step",),
+        "set_short_down": ("step",), "stop": ("stop_", "step"),
+        "set_position": ("position_target", "updown"), "set_angle": ("angle",),
+    },
+    "Climate": {
+        "set_target_temperature": ("target_temperature", "_setpoint_shift"),
+        "set_setpoint_shift": ("_setpoint_shift",), "turn_on": ("on",), "turn_off": ("on",),
+        "set_fan_speed": ("fan_speed",), "set_swing": ("swing",),
+        "set_horizontal_swing": ("horizontal_swing",),
+    },
+    "Fan": {
+        "turn_on": ("switch", "speed"), "turn_off": ("switch", "speed"),
+        "set_speed": ("speed",), "set_oscillation": ("oscillation",),
+    },
+    "NumericValue": {"set": ("sensor_value",)},
+    "RawValue": {"set": ("remote_value",)},
+    "Notification": {"set": ("remote_value",)},
+    "ExposeSensor": {"set": ("sensor_value",)},
+    "Scene": {"run": ("scene_value",)},
+}
+
+
+def resolve_action(device, action: str):
+    """The bound coroutine for an allowed action, or None."""
+    allowed = CONTROL_ACTIONS.get(device.__class__.__name__, set()) | COMMON_ACTIONS
+    if action not in allowed:
+        return None
+    return getattr(device, action, None)
+
+
+def action_group_addresses(device, action: str) -> tuple[set, type]:
+    """The addresses an action sends to, and the telegram type (a sync reads, everything else writes)."""
+    if action == "sync":
+        return {
+            rv.group_address_state for rv in device._iter_remote_values() if rv.group_address_state is not None
+        }, GroupValueRead
+
+    names = CONTROL_ACTION_WRITES.get(device.__class__.__name__, {}).get(action, ())
+    addresses = {
+        rv.group_address
+        for rv in (getattr(device, name, None) for name in names)
+        if rv is not None and rv.group_address is not None
+    }
+    if not addresses:
+        addresses = {rv.group_address for rv in device._iter_remote_values() if rv.group_address is not None}
+    return addresses, GroupValueWrite
+
+
+def _queued_telegrams(xknx) -> list[Telegram]:
+    """Outgoing telegrams still waiting in xknx's queues."""
+    return [
+        telegram
+        for queue in (xknx.telegrams, xknx.telegram_queue.outgoing_queue)
+        for telegram in list(queue._queue)
+        if telegram is not None
+    ]
+
+
+class TelegramWaiter:
+    __slots__ = ("addresses", "payload_type", "started", "earlier", "own", "future")
+
+    def __init__(self, addresses: set, payload_type: type, earlier: list):
+        self.addresses = addresses
+        self.payload_type = payload_type
+        self.started = time.perf_counter()
+        # Queued before the waiter started; these never count
+        self.earlier = earlier
+        # The telegrams the command itself queued, once known
+        self.own: list | None = None
+        self.future = asyncio.get_running_loop().create_future()
+
+    def matches(self, telegram: Telegram) -> bool:
+        if telegram.destination_address not in self.addresses:
+            return False
+        if not isinstance(telegram.payload, self.payload_type):
+            return False
+        if self.own is not None:
+            return any(t is telegram for t in self.own)
+        return not any(t is telegram for t in self.earlier)
+
+
+class OutgoingTelegramWaiters:
+    """
+    Lets a caller wait until the telegram its command queued has been handed
+    to the interface. xknx runs outgoing telegram callbacks only after the
+    send has completed, so this measures the send. Telegrams of another
+    type, or queued before the waiter started (state updater reads, other
+    sessions' writes), don't count.
+    """
+
+    def __init__(self):
+        self._waiters: list[TelegramWaiter] = []
+
+    def notify(self, telegram: Telegram):
+        if not self._waiters or telegram.direction != TelegramDirection.OUTGOING:
+            return
+        now = time.perf_counter()
+        for waiter in self._waiters:
+            if not waiter.future.done() and waiter.matches(telegram):
+                waiter.future.set_result(now)
+
+    def expect(self, xknx, addresses: set, payload_type: type = GroupValueWrite) -> TelegramWaiter:
+        """Start watching right away, before the command queues its telegram."""
+        waiter = TelegramWaiter(addresses, payload_type, _queued_telegrams(xknx))
+        self._waiters.append(waiter)
+        return waiter
+
+    def claim(self, xknx, waiter: TelegramWaiter):
+        """
+        Once the command has queued its telegrams, only those count. Device
+        setters queue synchronously, so whatever is new in the queues is ours.
+        """
+        own = [
+            telegram
+            for telegram in _queued_telegrams(xknx)
+            if not any(telegram is t for t in waiter.earlier) and telegram.destination_address in waiter.addresses
+        ]
+        if own:
+            waiter.own = own
+            waiter.earlier = []
+
+    async def wait(self, waiter: TelegramWaiter, timeout: float) -> float | None:
+        """perf_counter() at which the telegram went out, or None on timeout."""
+        try:
+            return await asyncio.wait_for(waiter.future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._waiters.remove(waiter)
+
+    def cancel(self, waiter: TelegramWaiter):
+        waiter.future.cancel()
+        self._waiters.remove(waiter)
+
+
+class AckQueue(asyncio.Queue):
+    """
+    Unbounded, since every request id must get its ack, but `has_room` is
+    cleared once `limit` acks are waiting; the socket reads no new commands
+    until the writer has caught up.
+    """
+
+    def __init__(self, limit: int = CONTROL_OUTBOX_SIZE):
+        super().__init__()
+        self.limit = max(1, limit)
+        self.has_room = asyncio.Event()
+        self.has_room.set()
+
+    def put_nowait(self, item):
+        super().put_nowait(item)
+        if self.qsize() >= self.limit:
+            self.has_room.clear()
+
+    def get_nowait(self):
+        item = super().get_nowait()
+        if self.qsize() < self.limit:
+            self.has_room.set()
+        return item
+
+
+class ControlSession:
+    """
+    Pipelined command execution for one control socket. Commands run
+    concurrently across devices and strictly in order per device. The last
+    command queued for a device is replaced by a newer one with the same
+    value-setting action (slider drags, see SUPERSEDABLE_ACTIONS) and acked
+    as "superseded". Every command is acknowledged with its request id.
+    """
+
+    def __init__(self, room):
+        self.room = room
+        self.outbox = AckQueue(CONTROL_OUTBOX_SIZE)
+        self._pending: dict[str, deque] = {}
+        self._workers: dict[str, asyncio.Task] = {}
+        self.binary = False
+
+    # --- framing -----------------------------------------------------------
+
+    def decode(self, message: dict) -> object:
+        """Turn a websocket receive() message into a frame; remembers the client's framing."""
+        if message.get("bytes") is not None:
+            if msgpack is None:
+                raise ValueError("Binary frames need msgpack installed on the server")
+            self.binary = True
+            return msgpack.unpackb(message["bytes"], raw=False)
+        self.binary = False
+        return orjson.loads(message["text"])
+
+    def encode(self, ack: dict) -> tuple[str, bytes | str]:
+        if self.binary:
+            return "bytes", msgpack.packb(ack, default=orjson_default)
+        return "text", dumps_text(ack)
+
+    # --- commands ----------------------------------------------------------
+
+    def submit_frame(self, frame):
+        """A frame is one command, a list of commands, or {"batch": [...]}."""
+        received = time.perf_counter()
+        if isinstance(frame, dict) and "batch" in frame:
+            frame = frame["batch"]
+        commands = frame if isinstance(frame, list) else [frame]
+        if len(commands) > CONTROL_MAX_BATCH:
+            self._ack({"status": "error", "error": f"At most {CONTROL_MAX_BATCH} commands per frame"})
+            return
+        for command in commands:
+            self.submit(command, received)
+
+    def submit(self, command, received: float):
+        if not isinstance(command, dict):
+            self._ack({"status": "error", "error": "Command must be an object"})
+            return
+        request_id = command.get("id")
+        device_name = command.get("device")
+        action = command.get("action")
+        if not device_name or not action:
+            self._error(request_id, "Missing 'device' or 'action'")
+            return
+
+        device = self.room.get_device_by_name(device_name)
+        if device is None:
+            self._error(request_id, f"Device '{device_name}' not found")
+            return
+        if resolve_action(device, action) is None:
+            self._error(request_id, f"Device '{device_name}' has no action '{action}'")
+            return
+
+        pending = self._pending.setdefault(device_name, deque())
+        # Only the newest queued command can be replaced, so per-device order holds
+        if (
+            pending
+            and pending[-1][0].get("action") == action
+            and action in SUPERSEDABLE_ACTIONS.get(device.__class__.__name__, ())
+        ):
+            superseded = pending.pop()[0]
+            self._ack({
+                "id": superseded.get("id"),
+                "status": "superseded",
+                "device": device_name,
+                "action": action,
+                "by": request_id,
+            })
+        pending.append((command, received))
+
+        if device_name not in self._workers:
+            self._workers[device_name] = asyncio.create_task(self._drain(device_name))
+
+    async def _drain(self, device_name: str):
+        pending = self._pending[device_name]
+        try:
+            while pending:
+                command, received = pending.popleft()
+                await self._execute(device_name, command, received)
+        finally:
+            del self._workers[device_name]
+            if not pending:
+                self._pending.pop(device_name, None)
+
+    async def _execute(self, device_name: str, command: dict, received: float):
+        request_id = command.get("id")
+        action = command["action"]
+        value = command.get("value")
+        started = time.perf_counter()
+
+        device = self.room.get_device_by_name(device_name)
+        method = resolve_action(device, action) if device is not None else None
+        if method is None:
+            self._error(request_id, f"Device '{device_name}' is no longer available")
+            return
+
+        waiters = self.room.outgoing_waiters
+        addresses, payload_type = action_group_addresses(device, action)
+        expected = waiters.expect(self.room.xknx, addresses, payload_type)
+        try:
+            if action == "sync":
+                # Reads share the gateway's rate limit, ahead of background polls
+                sync = asyncio.create_task(
+                    self.room.connection.read_scheduler.sync_device(device, READ_PRIORITY_USER)
+                )
+                sync.add_done_callback(lambda t: t.cancelled() or t.exception())
+            elif value is not None:
+                await method(value)
+            else:
+                await method()
+        except Exception as e:
+            waiters.cancel(expected)
+            self._error(request_id, str(e))
+            return
+        waiters.claim(self.room.xknx, expected)
+
+        sent_at = await waiters.wait(expected, CONTROL_BUS_ACK_TIMEOUT_MS / 1000)
+        ack = {
+            "id": request_id,
+            "status": "ok",
+            "device": device_name,
+            "action": action,
+            "value": value,
+            "queued_ms": round((started - received) * 1000, 2),
+            "bus_confirmed": sent_at is not None,
+        }
+        if sent_at is not None:
+            ack["bus_latency_ms"] = round((sent_at - expected.started) * 1000, 2)
+            ack["latency_ms"] = round((sent_at - received) * 1000, 2)
+        self._ack(ack)
+
+    def _error(self, request_id, error: str):
+        self._ack({"id": request_id, "status": "error", "error": error})
+
+    def _ack(self, ack: dict):
+        if ack.get("id") is None:
+            ack.pop("id", None)
+        self.outbox.put_nowait(ack)
+
+    def close(self):
+        for task in self._workers.values():
+            task.cancel()
+        self._pending.clear()
@@ -0,0 +1,96 @@
+# app/core/ga_batch.py
+import ast
+import asyncio
+import os
+import time
+
+from xknx.dpt import DPTArray, DPTBase, DPTBinary
+from xknx.telegram import Telegram
+from xknx.telegram.address import parse_device_group_address
+from xknx.telegram.apci import GroupValueWrite
+
+# Gap between telegrams of a batch; a TP1 line carries roughly 50 telegrams/s
+KNX_BATCH_INTERVAL_MS = float(os.getenv("KNX_BATCH_INTERVAL_MS", "25"))
+KNX_BATCH_MAX_ITEMS = int(os.getenv("KNX_BATCH_MAX_ITEMS", "500"))
+
+
+def parse_group_value(value, dpt: str | None = None) -> DPTBinary | DPTArray:
+    """
+    Turn a request value into a KNX payload without evaluating code.
+    Strings are read as Python literals ("21.5", "True", "(12, 34)") and
+    kept as text when they aren't one, so text DPTs still work.
+    """
+    if isinstance(value, str):
+        try:
+            value = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            if not dpt:
+                raise ValueError(f"Cannot parse value {value!r} without a DPT")
+
+    if dpt:
+        transcoder = DPTBase.parse_transcoder(dpt)
+        if transcoder is None:
+            raise ValueError(f"Unknown DPT {dpt!r}")
+        return transcoder.to_knx(value)
+
+    # Raw payloads: booleans and small ints are 6-bit values, sequences are byte arrays
+    if isinstance(value, bool):
+        return DPTBinary(int(value))
+    if isinstance(value, int):
+        return DPTBinary(value)
+    if isinstance(value, (list, tuple)) and all(isinstance(v, int) for v in value):
+        return DPTArray(tuple(value))
+    raise ValueError(f"Unsupported raw value {value!r}; pass a DPT")
+
+
+async def run_group_batch(room, items: list[dict], interval_ms: float | None = None) -> list[dict]:
+    """
+    Sends the writes (and performs the reads) of one batch in order through
+    the room's XKNX instance. Batches on the same gateway take turns so
+    their pacing adds up instead of overlapping. Every item gets a result.
+    """
+    interval = max(0.0, KNX_BATCH_INTERVAL_MS if interval_ms is None else interval_ms) / 1000
+    results = []
+
+    async with room.connection.bus_lock:
+        for index, item in enumerate(items):
+            address = item["address"]
+            dpt = item.get("dpt")
+            result = {"index": index, "address": address, "op": item.get("op", "write")}
+            try:
+                group_address = parse_device_group_address(address)
+                if result["op"] == "read":
+                    entry, cached = await room.ga_values.read(
+                        room.connection.read_scheduler, group_address, item.get("max_age") or 0
+                    )
+                    if entry is None:
+                        raise TimeoutError("No response from the bus")
+                    result.update(cached=cached, **room.ga_values.describe(entry, dpt))
+                else:
+                    if item.get("value") is None:
+                        raise ValueError("Missing value")
+                    payload = parse_group_value(item["value"], dpt)
+                    room.xknx.telegrams.put_nowait(
+                        Telegram(destination_address=group_address, payload=GroupValueWrite(payload))
+                    )
+                    result["value"] = item["value"]
+                result["status"] = "ok"
+            except Exception as e:
+                result["status"] = "error"
+                result["error"] = str(e)
+            results.append(result)
+
+            if interval and index < len(items) - 1:
+                await asyncio.sleep(interval)
+
+    return results
+
+
+def summarize_batch(results: list[dict], started: float) -> dict:
+    failed = sum(1 for r in results if r["status"] != "ok")
+    return {
+        "total": len(results),
+        "ok": len(results) - failed,
+        "failed": failed,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
@@ -0,0 +1,113 @@
+# app/core/ga_value_cache.py
+import asyncio
+import time
+
+from xknx.dpt import DPTBase
+from xknx.telegram import Telegram, TelegramDirection
+from xknx.telegram.address import GroupAddress, parse_device_group_address
+from xknx.telegram.apci import GroupValueResponse, GroupValueWrite
+
+from app.core.read_scheduler import READ_PRIORITY_USER
+
+
+class GroupAddressValueCache:
+    """
+    Last known value per group address, fed from GroupValueWrite and
+    GroupValueResponse telegrams. Bus reads for the same address that
+    overlap in time share one GroupValueRead.
+    """
+
+    def __init__(self):
+        # raw GA -> (timestamp, payload value, source, direction, decoded value or None)
+        self._entries: dict[int, tuple] = {}
+        self._inflight: dict[int, asyncio.Future] = {}
+        self.hits = 0
+        self.bus_reads = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(self, telegram: Telegram):
+        if not isinstance(telegram.destination_address, GroupAddress):
+            return
+        if not isinstance(telegram.payload, (GroupValueWrite, GroupValueResponse)):
+            return
+        decoded = telegram.decoded_data.value if telegram.decoded_data is not None else None
+        self._entries[telegram.destination_address.raw] = (
+            time.time(),
+            telegram.payload.value,
+            str(telegram.source_address),
+            telegram.direction,
+            decoded,
+        )
+
+    def clear(self):
+        self._entries.clear()
+
+    def get(self, address, max_age: float | None = None) -> tuple | None:
+        """Cached entry for the address, or None when missing or older than `max_age` seconds."""
+        entry = self._entries.get(parse_device_group_address(address).raw)
+        if entry is None:
+            return None
+        if max_age is not None and time.time() - entry[0] > max_age:
+            return None
+        return entry
+
+    async def read(self, scheduler, address, max_age: float | None = None) -> tuple[tuple | None, bool]:
+        """
+        Returns (entry, from_cache). Fresh entries are served from the cache;
+        otherwise one GroupValueRead goes out through the gateway's read
+        scheduler (as a user read), shared by every concurrent caller.
+        """
+        group_address = parse_device_group_address(address)
+        if max_age is not None and max_age > 0:
+            entry = self.get(group_address, max_age)
+            if entry is not None:
+                self.hits += 1
+                return entry, True
+
+        key = group_address.raw
+        pending = self._inflight.get(key)
+        if pending is None:
+            self.bus_reads += 1
+            pending = asyncio.ensure_future(self._read_from_bus(scheduler, group_address))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shielded so one caller going away doesn't cancel the read for the others
+        return await asyncio.shield(pending), False
+
+    async def _read_from_bus(self, scheduler, group_address: GroupAddress) -> tuple | None:
+        response = await scheduler.read(group_address, READ_PRIORITY_USER)
+        if response is None:
+            return None
+        self.record(response)
+        return self._entries.get(group_address.raw)
+
+    @staticmethod
+    def describe(entry: tuple, value_type=None) -> dict:
+        timestamp, payload, source, direction, decoded = entry
+        if value_type:
+            value = DPTBase.get_dpt(value_type).from_knx(payload)
+        elif decoded is not None:
+            value = decoded
+        else:
+            value = payload.value
+        return {
+            "value": value,
+            "timestamp": timestamp,
+            "age": round(time.time() - timestamp, 3),
+            "source": source,
+            "direction": "outgoing" if direction == TelegramDirection.OUTGOING else "incoming",
+        }
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "bus_reads": self.bus_reads,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
@@ -0,0 +1,96 @@
+# app/core/group_dispatcher.py
+import asyncio
+from collections import defaultdict
+
+from xknx.telegram import Telegram
+from xknx.telegram.address import GroupAddress
+from xknx.telegram.apci import GroupValueWrite
+
+from app.core.serialization import dumps_text
+from app.utils.device_state_resolvers import DEVICE_RESOLVERS
+
+
+def normalize_group_address(address: str) -> str:
+    """'1/2/3', '1/2/03' and raw integers all map to the same key."""
+    try:
+        return str(GroupAddress(address))
+    except Exception:
+        return str(address)
+
+
+class RoomGroupDispatcher:
+    """
+    One telegram callback per room for all /ws/group subscribers.
+    Subscribers are outbound queues (anything with put_nowait); the
+    telegram queue only does dict lookups and enqueues, the websocket
+    writer tasks do the actual sending. Messages are encoded to JSON text
+    once here, not once per subscriber.
+    """
+
+    def __init__(self, room):
+        self.room = room
+        self.ga_subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self.device_subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._xknx = None
+        self._callback = None
+
+    def _has_subscribers(self) -> bool:
+        return bool(self.ga_subscribers or self.device_subscribers)
+
+    def attach(self):
+        """Register on the room's telegram queue if anyone is listening."""
+        if self._callback is not None or self.room.xknx is None or not self._has_subscribers():
+            return
+        self._xknx = self.room.xknx
+        self._callback = self._xknx.telegram_queue.register_telegram_received_cb(
+            self._on_telegram
+        )
+
+    def detach(self):
+        if self._callback is not None and self._xknx is not None:
+            try:
+                self._xknx.telegram_queue.unregister_telegram_received_cb(self._callback)
+            except ValueError:
+                pass
+        self._xknx = None
+        self._callback = None
+
+    def subscribe_group_address(self, outbox: asyncio.Queue, address: str):
+        self.ga_subscribers[normalize_group_address(address)].add(outbox)
+        self.attach()
+
+    def subscribe_device(self, outbox: asyncio.Queue, device_name: str):
+        self.device_subscribers[device_name].add(outbox)
+        self.attach()
+
+    def unsubscribe(self, outbox: asyncio.Queue):
+        for index in (self.ga_subscribers, self.device_subscribers):
+            for key in list(index):
+                index[key].discard(outbox)
+                if not index[key]:
+                    del index[key]
+        if not self._has_subscribers():
+            self.detach()
+
+    def _on_telegram(self, telegram: Telegram):
+        dest = telegram.destination_address
+
+        # Raw GA subscriptions
+        if isinstance(telegram.payload, GroupValueWrite):
+            subscribers = self.ga_subscribers.get(str(dest))
+            if subscribers:
+                message = dumps_text({"group_address": str(dest), "value": telegram.payload.value.value})
+                for outbox in subscribers:
+                    outbox.put_nowait(message)
+
+        # Full device updates, only for devices that use this address
+        if not self.device_subscribers:
+            return
+        for device in self.room.devices_by_group_address.get(dest, ()):
+            subscribers = self.device_subscribers.get(device.name)
+            if not subscribers or device.__class__.__name__ not in DEVICE_RESOLVERS:
+                continue
+            state = self.room.get_device_state(device)
+            message = dumps_text({"device": device.name, "state": state})
+            for outbox in subscribers:
+                outbox.put_nowait(message)
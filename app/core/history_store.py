@@ -0,0 +1,270 @@
+# app/core/history_store.py
+import asyncio
+import os
+import time
+from collections import deque
+
+import aiosqlite
+
+HISTORY_ENABLED = os.getenv("HISTORY_ENABLED", "1") not in ("0", "false", "False")
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", "./app/uploads/device_history.db")
+# Buffered samples are written at least this often, or earlier once the batch fills up
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "2"))
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "500"))
+HISTORY_MAX_BUFFER = int(os.getenv("HISTORY_MAX_BUFFER", "50000"))
+# Raw samples are kept this long, then folded into hourly rollups that live much longer
+HISTORY_RAW_RETENTION_DAYS = float(os.getenv("HISTORY_RAW_RETENTION_DAYS", "7"))
+HISTORY_ROLLUP_RETENTION_DAYS = float(os.getenv("HISTORY_ROLLUP_RETENTION_DAYS", "365"))
+HISTORY_MAINTENANCE_INTERVAL = 3600
+
+ROLLUP_SECONDS = 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    room_id TEXT NOT NULL,
+    device TEXT NOT NULL,
+    ts REAL NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_samples_device_ts ON samples (room_id, device, ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    room_id TEXT NOT NULL,
+    device TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    sum REAL NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (room_id, device, hour)
+);
+"""
+
+
+def _as_number(value):
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+def _climate_temperature(device):
+    return device.temperature.value if device.temperature else None
+
+
+# One cheap, numeric reading per device type; no full resolver run
+HISTORY_VALUE_EXTRACTORS = {
+    "Sensor": lambda d: d.resolve_state(),
+    "NumericValue": lambda d: d.resolve_state(),
+    "BinarySensor": lambda d: d.state,
+    "Switch": lambda d: d.state,
+    "Light": lambda d: d.current_brightness if d.supports_brightness else d.state,
+    "Cover": lambda d: d.current_position(),
+    "Climate": _climate_temperature,
+    "Fan": lambda d: d.current_speed,
+}
+
+
+class DeviceHistoryWriter:
+    """
+    Buffers device samples in memory and writes them to SQLite in batched
+    transactions from a background task.
+    """
+
+    def __init__(self, path: str = HISTORY_DB_PATH):
+        self.path = path
+        self._buffer: deque[tuple[str, str, float, float]] = deque(maxlen=HISTORY_MAX_BUFFER)
+        self._db: aiosqlite.Connection | None = None
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+        self._last_maintenance = 0.0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+
+    @property
+    def running(self) -> bool:
+        return self._db is not None
+
+    def record_device(self, room_id: str, device):
+        if self._db is None:
+            return
+        extract = HISTORY_VALUE_EXTRACTORS.get(device.__class__.__name__)
+        if extract is None:
+            return
+        try:
+            value = _as_number(extract(device))
+        except Exception:
+            return
+        if value is None:
+            return
+        self.record(room_id, device.name, value)
+
+    def record(self, room_id: str, device_name: str, value: float, ts: float | None = None):
+        if self._db is None:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            # The disk is not keeping up; the deque sheds the oldest sample rather than grow unbounded
+            self.dropped += 1
+        self._buffer.append((str(room_id), device_name, ts or time.time(), value))
+        if len(self._buffer) >= HISTORY_BATCH_SIZE:
+            self._wakeup.set()
+
+    async def start(self):
+        if self._db is not None or not HISTORY_ENABLED:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._db = await aiosqlite.connect(self.path)
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.execute("PRAGMA synchronous=NORMAL")
+        await self._db.executescript(_SCHEMA)
+        await self._db.commit()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        print(f"🗄️ Device history writer started ({self.path})")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._db is not None:
+            await self._flush()
+            await self._db.close()
+            self._db = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=HISTORY_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._flush()
+                if time.time() - self._last_maintenance >= HISTORY_MAINTENANCE_INTERVAL:
+                    await self.apply_retention()
+            except Exception as e:
+                print(f"⚠️ Device history write failed: {e}")
+
+    async def _flush(self):
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, deque(maxlen=HISTORY_MAX_BUFFER)
+        try:
+            await self._db.executemany(
+                "INSERT INTO samples (room_id, device, ts, value) VALUES (?, ?, ?, ?)", batch
+            )
+            await self._db.commit()
+        except Exception:
+            await self._db.rollback()
+            # Put the batch back in front of what arrived meanwhile; whatever no longer fits is dropped
+            restored = deque(batch, maxlen=HISTORY_MAX_BUFFER)
+            overflow = len(restored) + len(self._buffer) - HISTORY_MAX_BUFFER
+            restored.extend(self._buffer)
+            self._buffer = restored
+            self.dropped += max(0, overflow)
+            raise
+        self.written += len(batch)
+        self.batches += 1
+
+    async def apply_retention(self, now: float | None = None):
+        """Fold raw samples past raw retention into hourly rollups, then drop expired data."""
+        now = now or time.time()
+        raw_cutoff = now - HISTORY_RAW_RETENTION_DAYS * 86400
+        # Only whole hours are folded, so a rollup row is never written twice
+        raw_cutoff -= raw_cutoff % ROLLUP_SECONDS
+        rollup_cutoff = now - HISTORY_ROLLUP_RETENTION_DAYS * 86400
+
+        await self._db.execute(
+            """
+            INSERT INTO rollups (room_id, device, hour, min, max, sum, count)
+            SELECT room_id, device, CAST(ts / ? AS INTEGER) * ?, MIN(value), MAX(value), SUM(value), COUNT(*)
+            FROM samples WHERE ts < ?
+            GROUP BY room_id, device, CAST(ts / ? AS INTEGER)
+            ON CONFLICT (room_id, device, hour) DO UPDATE SET
+                min = MIN(min, excluded.min),
+                max = MAX(max, excluded.max),
+                sum = sum + excluded.sum,
+                count = count + excluded.count
+            """,
+            (ROLLUP_SECONDS, ROLLUP_SECONDS, raw_cutoff, ROLLUP_SECONDS),
+        )
+        await self._db.execute("DELETE FROM samples WHERE ts < ?", (raw_cutoff,))
+        await self._db.execute("DELETE FROM rollups WHERE hour < ?", (rollup_cutoff,))
+        await self._db.commit()
+        self._last_maintenance = now
+
+    async def query(
+        self,
+        room_id: str,
+        device_name: str,
+        start: float,
+        end: float,
+        bucket: int,
+    ) -> list[dict]:
+        """min/max/avg per `bucket` seconds, from raw samples and hourly rollups."""
+        if self._db is None:
+            raise RuntimeError("Device history is not enabled")
+        # Samples still sitting in the buffer should show up too
+        await self._flush()
+
+        buckets: dict[int, list[float]] = {}
+
+        def merge(rows):
+            for t, lo, hi, total, count in rows:
+                current = buckets.get(t)
+                if current is None:
+                    buckets[t] = [lo, hi, total, count]
+                else:
+                    current[0] = min(current[0], lo)
+                    current[1] = max(current[1], hi)
+                    current[2] += total
+                    current[3] += count
+
+        async with self._db.execute(
+            """
+            SELECT CAST(ts / ? AS INTEGER) * ?, MIN(value), MAX(value), SUM(value), COUNT(*)
+            FROM samples WHERE room_id = ? AND device = ? AND ts >= ? AND ts < ?
+            GROUP BY 1
+            """,
+            (bucket, bucket, str(room_id), device_name, start, end),
+        ) as cursor:
+            merge(await cursor.fetchall())
+
+        async with self._db.execute(
+            """
+            SELECT CAST(hour / ? AS INTEGER) * ?, MIN(min), MAX(max), SUM(sum), SUM(count)
+            FROM rollups WHERE room_id = ? AND device = ? AND hour >= ? AND hour < ?
+            GROUP BY 1
+            """,
+            (bucket, bucket, str(room_id), device_name, start, end),
+        ) as cursor:
+            merge(await cursor.fetchall())
+
+        return [
+            {
+                "t": t,
+                "min": lo,
+                "max": hi,
+                "avg": total / count if count else None,
+                "count": count,
+            }
+            for t, (lo, hi, total, count) in sorted(buckets.items())
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.running,
+            "path": self.path,
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+        }
+
+
+device_history_writer = DeviceHistoryWriter()
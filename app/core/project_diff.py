@@ -0,0 +1,66 @@
+# app/core/project_diff.py
+import hashlib
+import zipfile
+
+import orjson
+
+DIFFED_SECTIONS = ("group_addresses", "devices", "functions")
+
+
+def archive_parts(path: str) -> dict[str, str]:
+    """
+    Fingerprint the XML parts of a .knxproj archive.
+    CRC and size come from the zip central directory, so nothing is decompressed.
+    Password protected projects keep their data in an inner .zip, which is
+    fingerprinted as a single part.
+    """
+    parts = {}
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.filename.endswith((".xml", ".zip")):
+                parts[info.filename] = f"{info.CRC:08x}:{info.file_size}"
+    return parts
+
+
+def archive_fingerprint(parts: dict[str, str]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(parts):
+        digest.update(f"{name}={parts[name]}\n".encode())
+    return digest.hexdigest()
+
+
+def changed_parts(old: dict[str, str], new: dict[str, str]) -> dict[str, list[str]]:
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "removed": sorted(old.keys() - new.keys()),
+        "changed": sorted(k for k in new.keys() & old.keys() if new[k] != old[k]),
+    }
+
+
+def _entry_bytes(entry) -> bytes:
+    # Normalise tuples/lists and key order so a reloaded entry compares equal
+    return orjson.dumps(entry, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+
+
+def diff_section(old: dict, new: dict) -> dict[str, list[str]]:
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "removed": sorted(old.keys() - new.keys()),
+        "changed": sorted(
+            key
+            for key in new.keys() & old.keys()
+            if _entry_bytes(new[key]) != _entry_bytes(old[key])
+        ),
+    }
+
+
+def diff_projects(old: dict, new: dict) -> dict[str, dict[str, list[str]]]:
+    """Added, removed and changed keys per section, e.g. diff["group_addresses"]["changed"]."""
+    return {
+        section: diff_section(old.get(section) or {}, new.get(section) or {})
+        for section in DIFFED_SECTIONS
+    }
+
+
+def empty_diff() -> dict[str, dict[str, list[str]]]:
+    return {section: {"added": [], "removed": [], "changed": []} for section in DIFFED_SECTIONS}
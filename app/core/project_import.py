@@ -0,0 +1,261 @@
+# app/core/project_import.py
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.project_store import knx_project_store
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_TRACKED_JOBS = 20
+
+# Rough share of the overall progress bar owned by each phase
+_PHASE_PROGRESS = {
+    "queued": 0.0,
+    "uploading": 0.0,
+    "parsing": 0.3,
+    "loading": 0.9,
+    "done": 1.0,
+}
+
+
+def _load_previous(output_path: str, snapshot_path: str) -> dict | None:
+    from app.core.project_diff import DIFFED_SECTIONS
+    from app.core.project_snapshot import ProjectSnapshot
+
+    try:
+        if os.path.exists(snapshot_path):
+            snapshot = ProjectSnapshot(snapshot_path)
+            return {section: snapshot.section(section) or {} for section in DIFFED_SECTIONS}
+        if os.path.exists(output_path):
+            with open(output_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Could not load previous KNX project for diffing: {e}")
+    return None
+
+
+def _parse_and_write(
+    project_path: str,
+    output_path: str,
+    snapshot_path: str,
+    manifest_path: str,
+    incremental: bool = False,
+) -> dict:
+    """
+    Runs in a worker process: parse the .knxproj and write the JSON output
+    plus its binary snapshot. Both are written to temp files and swapped in
+    atomically so the project store never sees a half-written file.
+
+    In incremental mode an archive whose XML parts are unchanged since the
+    last import is not parsed again, and a changed one is diffed against
+    the previous parse.
+    """
+    from xknxproject import XKNXProj
+    from app.core.project_diff import (
+        archive_parts,
+        archive_fingerprint,
+        changed_parts,
+        diff_projects,
+        empty_diff,
+    )
+    from app.core.project_snapshot import write_snapshot
+
+    parts = archive_parts(project_path)
+    fingerprint = archive_fingerprint(parts)
+
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    if (
+        incremental
+        and manifest.get("fingerprint") == fingerprint
+        and os.path.exists(output_path)
+    ):
+        return {
+            **manifest.get("counts", {}),
+            "reused": True,
+            "changed_parts": changed_parts(parts, parts),
+            "diff": empty_diff(),
+        }
+
+    previous = _load_previous(output_path, snapshot_path) if incremental else None
+
+    parsed = XKNXProj(path=project_path).parse()
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(parsed, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output_path)
+    # Written after the JSON so its mtime marks it as current
+    write_snapshot(parsed, snapshot_path)
+
+    counts = {
+        "devices": len(parsed.get("devices", {})),
+        "group_addresses": len(parsed.get("group_addresses", {})),
+        "functions": len(parsed.get("functions", {})),
+    }
+
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": fingerprint, "parts": parts, "counts": counts}, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+    result = {**counts, "reused": False}
+    if incremental:
+        result["changed_parts"] = changed_parts(manifest.get("parts", {}), parts)
+        result["diff"] = diff_projects(previous or {}, parsed)
+    return result
+
+
+class ImportJob:
+    def __init__(self, filename: str, total_bytes: int | None):
+        self.job_id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = "queued"
+        self.total_bytes = total_bytes
+        self.bytes_received = 0
+        self.error: str | None = None
+        self.result: dict | None = None
+        self.created_at = time.time()
+        self.finished_at: float | None = None
+
+    @property
+    def progress(self) -> float:
+        if self.status == "uploading" and self.total_bytes:
+            upload_share = _PHASE_PROGRESS["parsing"]
+            return round(upload_share * min(self.bytes_received / self.total_bytes, 1.0), 3)
+        return _PHASE_PROGRESS.get(self.status, 1.0)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "file": self.filename,
+            "status": self.status,
+            "progress": self.progress,
+            "bytes_received": self.bytes_received,
+            "total_bytes": self.total_bytes,
+            "error": self.error,
+            "result": self.result,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ProjectImportManager:
+    def __init__(self):
+        self.jobs: dict[str, ImportJob] = {}
+        self._executor: ProcessPoolExecutor | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # One worker: imports are serialized and never compete for CPU with each other
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _track(self, job: ImportJob):
+        self.jobs[job.job_id] = job
+        while len(self.jobs) > MAX_TRACKED_JOBS:
+            oldest = next(iter(self.jobs))
+            if self.jobs[oldest].status not in ("done", "failed"):
+                break
+            del self.jobs[oldest]
+
+    def get_job(self, job_id: str) -> ImportJob | None:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self) -> list[dict]:
+        return [job.to_dict() for job in reversed(self.jobs.values())]
+
+    @staticmethod
+    def _copy_upload(src, dst_path: str, job: ImportJob):
+        with open(dst_path, "wb") as dst:
+            while True:
+                chunk = src.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                dst.write(chunk)
+                job.bytes_received += len(chunk)
+
+    async def start(
+        self,
+        upload,
+        upload_dir: str,
+        output_path: str,
+        snapshot_path: str,
+        manifest_path: str,
+        incremental: bool = False,
+    ) -> ImportJob:
+        """Stream the upload to disk off the event loop, then parse it in the background."""
+        filename = os.path.basename(upload.filename)
+        job = ImportJob(filename, getattr(upload, "size", None))
+        self._track(job)
+
+        filepath = os.path.join(upload_dir, filename)
+        job.status = "uploading"
+        try:
+            await asyncio.to_thread(self._copy_upload, upload.file, filepath, job)
+        except Exception as e:
+            self._fail(job, f"Failed to store upload: {e}")
+            return job
+
+        task = asyncio.create_task(
+            self._run(job, filepath, output_path, snapshot_path, manifest_path, incremental)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(
+        self,
+        job: ImportJob,
+        filepath: str,
+        output_path: str,
+        snapshot_path: str,
+        manifest_path: str,
+        incremental: bool,
+    ):
+        loop = asyncio.get_running_loop()
+        try:
+            job.status = "parsing"
+            job.result = await loop.run_in_executor(
+                self._get_executor(),
+                _parse_and_write,
+                filepath,
+                output_path,
+                snapshot_path,
+                manifest_path,
+                incremental,
+            )
+
+            # Open the new snapshot off the loop; sections load lazily on demand
+            job.status = "loading"
+            await asyncio.to_thread(knx_project_store.refresh)
+
+            job.status = "done"
+            job.finished_at = time.time()
+            print(
+                f"✅ KNX project import {job.job_id} finished: "
+                f"{job.result['group_addresses']} group addresses, "
+                f"{job.result['devices']} devices, reused={job.result['reused']}"
+            )
+        except Exception as e:
+            self._fail(job, f"Failed to parse KNX project: {e}")
+
+    @staticmethod
+    def _fail(job: ImportJob, message: str):
+        job.status = "failed"
+        job.error = message
+        job.finished_at = time.time()
+        print(f"❌ KNX project import {job.job_id} failed: {message}")
+
+
+project_import_manager = ProjectImportManager()
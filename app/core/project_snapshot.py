@@ -0,0 +1,108 @@
+# app/core/project_snapshot.py
+import mmap
+import os
+import struct
+
+import orjson
+
+# Layout:
+#   MAGIC | version (u16) | header length (u32) | header (orjson) | data blocks
+# The header maps every project section to an (offset, length) block, with
+# offsets relative to the start of the data blocks.
+# Indexed sections are written as one JSON object whose values sit at known
+# offsets, so a single entry can be decoded without parsing the whole section.
+MAGIC = b"IVKNXSNP"
+VERSION = 1
+_PREAMBLE = struct.Struct("<8sHI")
+# ETS data occasionally carries non-string keys; json.dump coerced them too
+_DUMPS_OPTS = orjson.OPT_NON_STR_KEYS
+
+INDEXED_SECTIONS = ("devices", "group_addresses", "functions")
+
+
+def write_snapshot(project: dict, path: str):
+    blocks = bytearray()
+    sections: dict[str, list[int]] = {}
+    indexes: dict[str, list[int]] = {}
+
+    for name, value in project.items():
+        if name in INDEXED_SECTIONS and isinstance(value, dict):
+            start = len(blocks)
+            entries: dict[str, list[int]] = {}
+            blocks += b"{"
+            for i, (key, entry) in enumerate(value.items()):
+                if i:
+                    blocks += b","
+                blocks += orjson.dumps(key, option=_DUMPS_OPTS) + b":"
+                encoded = orjson.dumps(entry, option=_DUMPS_OPTS)
+                entries[key] = [len(blocks), len(encoded)]
+                blocks += encoded
+            blocks += b"}"
+            sections[name] = [start, len(blocks) - start]
+
+            index = orjson.dumps(entries, option=_DUMPS_OPTS)
+            indexes[name] = [len(blocks), len(index)]
+            blocks += index
+        else:
+            encoded = orjson.dumps(value, option=_DUMPS_OPTS)
+            sections[name] = [len(blocks), len(encoded)]
+            blocks += encoded
+
+    header = orjson.dumps({"sections": sections, "indexes": indexes})
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        f.write(blocks)
+    os.replace(tmp_path, path)
+
+
+class ProjectSnapshot:
+    """Read-only, memory-mapped view of a snapshot written by write_snapshot."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_len = _PREAMBLE.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unsupported project snapshot format in {path}")
+
+        header = orjson.loads(self._mm[_PREAMBLE.size:_PREAMBLE.size + header_len])
+        self._data_offset = _PREAMBLE.size + header_len
+        self._sections: dict[str, list[int]] = header["sections"]
+        self._index_blocks: dict[str, list[int]] = header["indexes"]
+        self._indexes: dict[str, dict[str, list[int]]] = {}
+
+    def _read(self, offset: int, length: int):
+        start = self._data_offset + offset
+        return orjson.loads(self._mm[start:start + length])
+
+    def section_names(self) -> list[str]:
+        return list(self._sections)
+
+    def has_section(self, name: str) -> bool:
+        return name in self._sections
+
+    def section(self, name: str):
+        block = self._sections.get(name)
+        if block is None:
+            return None
+        return self._read(*block)
+
+    def lookup(self, name: str, key: str):
+        index = self._indexes.get(name)
+        if index is None:
+            block = self._index_blocks.get(name)
+            if block is None:
+                section = self.section(name) or {}
+                return section.get(key)
+            index = self._read(*block)
+            self._indexes[name] = index
+
+        entry = index.get(key)
+        if entry is None:
+            return None
+        return self._read(*entry)
@@ -0,0 +1,184 @@
+# app/core/project_store.py
+import hashlib
+import json
+import os
+import threading
+from typing import Callable
+
+import orjson
+
+from app.core.project_snapshot import ProjectSnapshot
+
+UPLOAD_DIR = "./app/uploads"
+PARSED_OUTPUT = os.path.join(UPLOAD_DIR, "parsed_knx_project.json")
+PARSED_SNAPSHOT = os.path.join(UPLOAD_DIR, "parsed_knx_project.snap")
+PARSED_MANIFEST = os.path.join(UPLOAD_DIR, "parsed_knx_project.manifest.json")
+
+
+class KNXProjectStore:
+    """
+    Keeps the parsed KNXProject in memory with lookup indexes.
+    Sections are read lazily from the binary snapshot when one is available,
+    falling back to the JSON file otherwise. When either file's mtime changes
+    the in-memory copy is dropped and reloaded on the next access.
+
+    Lazy fills (sections, the location index, response bodies) are built
+    outside the lock, since the sync routes call in from the threadpool; each
+    is stored only if no reload happened meanwhile (`_generation`).
+    """
+
+    def __init__(self, path: str, snapshot_path: str | None = None):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()
+        self._signature: tuple | None = None
+        self._generation = 0
+        self._snapshot: ProjectSnapshot | None = None
+        self._sections: dict[str, dict] = {}
+        self._locations_by_name: dict[str, dict] | None = None
+        # Pre-serialized response bodies keyed by projection name -> (body, etag)
+        self._bodies: dict[str, tuple[bytes, str]] = {}
+
+    @staticmethod
+    def _mtime(path: str | None) -> float | None:
+        if path is None:
+            return None
+        try:
+            return os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _reset(self):
+        self._generation += 1
+        self._signature = None
+        self._snapshot = None
+        self._sections = {}
+        self._locations_by_name = None
+        self._bodies = {}
+
+    def _refresh(self) -> bool:
+        """Make sure the cached state matches the files on disk. Returns False if there is no project."""
+        json_mtime = self._mtime(self.path)
+        snapshot_mtime = self._mtime(self.snapshot_path)
+        signature = (json_mtime, snapshot_mtime)
+        if signature == self._signature:
+            return True
+
+        with self._lock:
+            if signature == self._signature:
+                return True
+            self._reset()
+            if json_mtime is None and snapshot_mtime is None:
+                return False
+
+            # A snapshot older than the JSON is stale (e.g. the JSON was replaced by hand)
+            if snapshot_mtime is not None and (json_mtime is None or snapshot_mtime >= json_mtime):
+                self._snapshot = ProjectSnapshot(self.snapshot_path)
+                print(f"📦 Opened KNX project snapshot {self.snapshot_path}")
+            else:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._sections = json.load(f)
+                print(f"📦 Loaded KNX project into memory from {self.path}")
+            self._signature = signature
+            return True
+
+    def refresh(self) -> bool:
+        return self._refresh()
+
+    def invalidate(self):
+        with self._lock:
+            self._reset()
+
+    def _store(self, generation: int, fill: Callable[[], object]):
+        """Run `fill` under the lock, unless the project was reloaded after `generation`."""
+        with self._lock:
+            if generation == self._generation:
+                fill()
+
+    def _load_section(self, key: str) -> dict:
+        with self._lock:
+            generation, sections, snapshot = self._generation, self._sections, self._snapshot
+        section = sections.get(key)
+        if section is None and snapshot is not None:
+            section = snapshot.section(key)
+            if section is None:
+                section = {}
+            self._store(generation, lambda: self._sections.setdefault(key, section))
+        return section if section is not None else {}
+
+    def project(self) -> dict | None:
+        if not self._refresh():
+            return None
+        if self._snapshot is not None:
+            for key in self._snapshot.section_names():
+                self._load_section(key)
+        return self._sections
+
+    def section(self, key: str) -> dict | None:
+        if not self._refresh():
+            return None
+        return self._load_section(key)
+
+    def _lookup(self, key: str, item: str) -> dict | None:
+        if not self._refresh():
+            return None
+        if key not in self._sections and self._snapshot is not None:
+            # Decode just this entry instead of the whole section
+            return self._snapshot.lookup(key, item)
+        return self._load_section(key).get(item)
+
+    def get_device(self, individual_address: str) -> dict | None:
+        return self._lookup("devices", individual_address)
+
+    def get_group_address(self, address: str) -> dict | None:
+        return self._lookup("group_addresses", address)
+
+    def get_function(self, identifier: str) -> dict | None:
+        return self._lookup("functions", identifier)
+
+    def get_location(self, name: str) -> dict | None:
+        if not self._refresh():
+            return None
+        locations = self._locations_by_name
+        if locations is None:
+            generation = self._generation
+            locations_by_name = {}
+
+            def walk(spaces: dict):
+                for space in spaces.values():
+                    space_name = space.get("name")
+                    if space_name is not None:
+                        locations_by_name.setdefault(space_name, space)
+                    walk(space.get("spaces") or {})
+
+            walk(self._load_section("locations"))
+
+            def fill():
+                self._locations_by_name = locations_by_name
+
+            self._store(generation, fill)
+            locations = locations_by_name
+        return locations.get(name)
+
+    def cached_body(
+        self, key: str, section: str, build: Callable[[dict], object]
+    ) -> tuple[bytes, str] | None:
+        """
+        Return (json_bytes, etag) for a projection of one project section.
+        The projection is built and serialized once per loaded project.
+        """
+        if not self._refresh():
+            return None
+
+        with self._lock:
+            generation, bodies = self._generation, self._bodies
+        cached = bodies.get(key)
+        if cached is None:
+            body = orjson.dumps(build(self._load_section(section)), option=orjson.OPT_NON_STR_KEYS)
+            etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+            cached = (body, etag)
+            self._store(generation, lambda: self._bodies.setdefault(key, cached))
+        return cached
+
+
+knx_project_store = KNXProjectStore(PARSED_OUTPUT, PARSED_SNAPSHOT)
@@ -0,0 +1,186 @@
+# app/core/read_scheduler.py
+import asyncio
+import heapq
+import itertools
+import os
+import time
+
+from xknx.core import ValueReader
+from xknx.core.state_updater import StateUpdater, _StateTracker
+from xknx.telegram import Telegram
+from xknx.telegram.address import GroupAddress, parse_device_group_address
+
+# Group reads per second per gateway, and how many may go out back to back
+KNX_READ_RATE = float(os.getenv("KNX_READ_RATE", "10"))
+KNX_READ_BURST = float(os.getenv("KNX_READ_BURST", "5"))
+KNX_READ_TIMEOUT = float(os.getenv("KNX_READ_TIMEOUT", "2"))
+
+READ_PRIORITY_USER = 0
+READ_PRIORITY_STALE = 1
+READ_PRIORITY_BACKGROUND = 2
+_PRIORITY_NAMES = {
+    READ_PRIORITY_USER: "user",
+    READ_PRIORITY_STALE: "stale",
+    READ_PRIORITY_BACKGROUND: "background",
+}
+
+
+class GroupReadScheduler:
+    """
+    All GroupValueReads of one gateway go through here. A token bucket caps
+    the read rate; user reads go before stale-state refreshes, which go
+    before background polls, and non-user reads also wait until the
+    gateway's outgoing telegram queue is empty. A read for an address that is already queued or on the bus
+    joins the existing one (taking the higher priority).
+    """
+
+    def __init__(self, xknx, rate: float = KNX_READ_RATE, burst: float = KNX_READ_BURST):
+        self.xknx = xknx
+        self.rate = max(0.1, rate)
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._refilled = time.monotonic()
+        self._heap: list[tuple[int, int, int]] = []
+        self._seq = itertools.count()
+        # raw GA -> [future, priority, dispatched]
+        self._reads: dict[int, list] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.sent = 0
+        self.deduplicated = 0
+        self.timeouts = 0
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        # Waiters get None, as on a read timeout; cancelling would hit callers that only catch Exception
+        for future, _, _ in self._reads.values():
+            if not future.done():
+                future.set_result(None)
+        self._reads.clear()
+        self._heap.clear()
+
+    async def read(self, address, priority: int = READ_PRIORITY_USER) -> Telegram | None:
+        """Queue a read and wait for the response telegram (None on timeout)."""
+        group_address = parse_device_group_address(address)
+        key = group_address.raw
+        entry = self._reads.get(key)
+        if entry is not None:
+            self.deduplicated += 1
+            if priority < entry[1] and not entry[2]:
+                # Jump the queue; the old heap item is skipped when popped
+                entry[1] = priority
+                heapq.heappush(self._heap, (priority, next(self._seq), key))
+                self._wakeup.set()
+        else:
+            entry = [asyncio.get_running_loop().create_future(), priority, False]
+            self._reads[key] = entry
+            heapq.heappush(self._heap, (priority, next(self._seq), key))
+            self.start()
+            self._wakeup.set()
+        return await asyncio.shield(entry[0])
+
+    async def sync_device(self, device, priority: int = READ_PRIORITY_USER):
+        """Read every state address of a device through the scheduler."""
+        addresses = {
+            rv.group_address_state
+            for rv in device._iter_remote_values()
+            if isinstance(rv.group_address_state, GroupAddress)
+        }
+        await asyncio.gather(*(self.read(address, priority) for address in addresses))
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _pop(self) -> tuple[int, int] | None:
+        while self._heap:
+            priority, _, key = heapq.heappop(self._heap)
+            entry = self._reads.get(key)
+            if entry is not None and not entry[2] and entry[1] == priority:
+                return priority, key
+        return None
+
+    async def _run(self):
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+
+            # Decide what goes out only now, so a user read queued meanwhile wins
+            popped = self._pop()
+            if popped is None:
+                continue
+            priority, key = popped
+            if priority != READ_PRIORITY_USER and self.xknx.telegram_queue.outgoing_queue.qsize():
+                # xknx.telegrams is drained at once; the rate-limited backlog waits here
+                heapq.heappush(self._heap, (priority, next(self._seq), key))
+                await asyncio.sleep(0.05)
+                continue
+
+            self._tokens -= 1
+            self._reads[key][2] = True
+            self.sent += 1
+            asyncio.create_task(self._send(key))
+
+    async def _send(self, key: int):
+        try:
+            response = await ValueReader(self.xknx, GroupAddress(key), KNX_READ_TIMEOUT).read()
+        except Exception:
+            response = None
+        if response is None:
+            self.timeouts += 1
+        entry = self._reads.pop(key, None)
+        if entry is not None and not entry[0].done():
+            entry[0].set_result(response)
+
+    def stats(self) -> dict:
+        queued = {name: 0 for name in _PRIORITY_NAMES.values()}
+        in_flight = 0
+        for _, priority, dispatched in self._reads.values():
+            if dispatched:
+                in_flight += 1
+            else:
+                queued[_PRIORITY_NAMES[priority]] += 1
+        self._refill()
+        return {
+            "queue_depth": sum(queued.values()),
+            "queued": queued,
+            "in_flight": in_flight,
+            "rate": self.rate,
+            "tokens": round(self._tokens, 2),
+            "sent": self.sent,
+            "deduplicated": self.deduplicated,
+            "timeouts": self.timeouts,
+        }
+
+
+class ScheduledStateUpdater(StateUpdater):
+    """xknx's StateUpdater, with its periodic reads queued as background reads."""
+
+    def __init__(self, xknx, scheduler: GroupReadScheduler, default_tracker_option=False):
+        super().__init__(xknx, default_tracker_option=default_tracker_option)
+        self.scheduler = scheduler
+
+    def register_remote_value(self, remote_value, tracker_options=True) -> None:
+        async def read_state() -> None:
+            await self.scheduler.read(remote_value.group_address_state, READ_PRIORITY_BACKGROUND)
+
+        tracker_options = self.parse_tracker_options(tracker_options, str(remote_value))
+        tracker = _StateTracker(read_state_awaitable=read_state, tracker_options=tracker_options)
+        self._workers[id(remote_value)] = tracker
+        if self.started:
+            tracker.start()
@@ -0,0 +1,48 @@
+# app/core/room_registry.py
+
+
+class RoomRegistry:
+    """
+    The connected rooms, indexed by room ID. Room IDs are compared as
+    strings. Device lookups go through the room itself
+    (RoomKNX.devices_by_name / devices_by_group_address).
+    """
+
+    def __init__(self):
+        self._rooms: dict[str, object] = {}
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def __contains__(self, room_id) -> bool:
+        return str(room_id) in self._rooms
+
+    def add(self, room):
+        """Register a room, replacing any previous instance with the same ID (not disconnected here)."""
+        self._rooms[str(room.room_id)] = room
+
+    def remove(self, room_id):
+        """Unregister and return the room, or None."""
+        return self._rooms.pop(str(room_id), None)
+
+    def clear(self) -> list:
+        """Unregister everything; returns the rooms that were registered."""
+        rooms = list(self._rooms.values())
+        self._rooms = {}
+        return rooms
+
+    def get(self, room_id):
+        return self._rooms.get(str(room_id))
+
+    def rooms(self) -> dict:
+        """Snapshot of room ID -> room, safe to iterate while rooms come and go."""
+        return dict(self._rooms)
+
+    def stats(self) -> dict:
+        return {
+            "rooms": len(self._rooms),
+            "devices": sum(len(room.devices) for room in self._rooms.values()),
+        }
+
+
+room_registry = RoomRegistry()
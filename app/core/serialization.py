@@ -0,0 +1,62 @@
+# app/core/serialization.py
+import dataclasses
+from enum import Enum
+
+import orjson
+from fastapi import WebSocket
+from fastapi.responses import ORJSONResponse
+from xknx.dpt import DPTArray, DPTBinary
+from xknx.dpt.dpt import DPTComplexData
+from xknx.telegram.address import GroupAddress, IndividualAddress, InternalGroupAddress
+
+# xknx color/date values are dataclasses; they go through the hook so they come out in their as_dict() form
+_DUMPS_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+def orjson_default(obj):
+    """
+    Called by orjson for anything it can't encode itself. Enums with plain
+    values and tuples (RGB, HS, RGBW) are handled natively and never get here.
+    """
+    if isinstance(obj, (GroupAddress, IndividualAddress, InternalGroupAddress)):
+        return str(obj)
+    if isinstance(obj, DPTComplexData):
+        return obj.as_dict()
+    if isinstance(obj, (DPTBinary, DPTArray)):
+        return obj.value
+    if isinstance(obj, Enum):
+        return obj.name.lower()
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.hex()
+    return str(obj)
+
+
+def dumps(data) -> bytes:
+    return orjson.dumps(data, default=orjson_default, option=_DUMPS_OPTS)
+
+
+def dumps_text(data) -> str:
+    """For WebSocket text frames."""
+    return orjson.dumps(data, default=orjson_default, option=_DUMPS_OPTS).decode()
+
+
+class KNXJSONResponse(ORJSONResponse):
+    """Default response class of the app: orjson, with the xknx hook."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+async def send_json(websocket: WebSocket, data):
+    """send_json replacement. Strings are treated as already-encoded frames and sent as-is."""
+    if not isinstance(data, str):
+        data = dumps_text(data)
+    await websocket.send_text(data)
+
+
+async def receive_json(websocket: WebSocket):
+    return orjson.loads(await websocket.receive_text())
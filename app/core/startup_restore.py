@@ -0,0 +1,157 @@
+# app/core/startup_restore.py
+import asyncio
+import json
+import os
+import time
+
+from knx_control import update_room_configuration, get_all_rooms
+from app.utils.knx_device_loader import gateway_pool
+
+KNX_AUTO_RESTORE = os.getenv("KNX_AUTO_RESTORE", "1") not in ("0", "false", "False")
+# Saved by POST /knx-config, applied by /knx-config-runtime and restored from here on startup
+KNX_RUNTIME_CONFIG_PATH = os.getenv(
+    "KNX_RUNTIME_CONFIG_PATH", "./app/uploads/knx_runtime_config.json"
+)
+# Initial state reads per second, per gateway, during the warm-up wave
+KNX_WARMUP_READS_PER_SECOND = float(os.getenv("KNX_WARMUP_READS_PER_SECOND", "5"))
+
+
+def _state_reads(device) -> int:
+    """How many GroupValueReads a device's state updater starts with."""
+    return sum(1 for rv in device._iter_remote_values() if rv.group_address_state is not None)
+
+
+class StartupRestore:
+    """
+    Brings back the saved runtime config after a restart, in the background:
+    rooms are connected with their state updaters held back, then released
+    gateway by gateway at a fixed read rate so the initial reads are spread
+    over the line instead of all going out at once.
+    """
+
+    def __init__(self, path: str = KNX_RUNTIME_CONFIG_PATH, reads_per_second: float = KNX_WARMUP_READS_PER_SECOND):
+        self.path = path
+        self.reads_per_second = max(0.1, reads_per_second)
+        self.state = "idle"
+        self.error: str | None = None
+        self.connect_result: dict | None = None
+        self.devices_total = 0
+        self.devices_warmed = 0
+        self.reads_sent = 0
+        self.started_at: float | None = None
+        self.connected_at: float | None = None
+        self.finished_at: float | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state in ("ready", "no_config", "disabled")
+
+    def start(self):
+        if not KNX_AUTO_RESTORE:
+            self.state = "disabled"
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        self.started_at = time.time()
+        if not os.path.exists(self.path):
+            self.state = "no_config"
+            print("ℹ️ No saved KNX runtime config; waiting for /knx-config-runtime")
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                rooms = json.load(f)["rooms"]
+
+            self.state = "connecting"
+            print(f"♻️ Restoring {len(rooms)} KNX rooms from {self.path}")
+            gateway_pool.defer_state_updaters = True
+            try:
+                self.connect_result = await update_room_configuration(rooms)
+            finally:
+                gateway_pool.defer_state_updaters = False
+            self.connected_at = time.time()
+
+            self.state = "warming"
+            await self._warm_up()
+            self.state = "ready"
+            print(
+                f"✅ KNX restore done: {self.connect_result['configured']} rooms, "
+                f"{self.reads_sent} state reads in {round(time.time() - self.started_at, 1)}s"
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            print(f"❌ KNX restore failed: {e}")
+        finally:
+            # Nothing may stay deferred, whatever happened above
+            for connection in gateway_pool.connections.values():
+                connection.defer_state_updaters = False
+                while connection.register_next_state_updater() is not None:
+                    pass
+            self.finished_at = time.time()
+
+    async def _warm_up(self):
+        connections = list(gateway_pool.connections.values())
+        self.devices_total = sum(len(c.deferred_state_updaters) for c in connections)
+        await asyncio.gather(*(self._warm_connection(c) for c in connections))
+
+    async def _warm_connection(self, connection):
+        connection.defer_state_updaters = False
+        while True:
+            device = connection.register_next_state_updater()
+            if device is None:
+                return
+            reads = _state_reads(device)
+            self.devices_warmed += 1
+            self.reads_sent += reads
+            if reads:
+                await asyncio.sleep(reads / self.reads_per_second)
+
+    def status(self) -> dict:
+        values_known = 0
+        devices = 0
+        for room in get_all_rooms().values():
+            for device in room.devices:
+                devices += 1
+                if all(
+                    rv.value is not None
+                    for rv in device._iter_remote_values()
+                    if rv.group_address_state is not None
+                ):
+                    values_known += 1
+
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "error": self.error,
+            "rooms": self.connect_result,
+            "warmup": {
+                "devices_total": self.devices_total,
+                "devices_warmed": self.devices_warmed,
+                "reads_sent": self.reads_sent,
+                "reads_per_second": self.reads_per_second,
+                "progress": round(self.devices_warmed / self.devices_total, 3) if self.devices_total else None,
+            },
+            "devices_with_state": values_known,
+            "devices": devices,
+            "started_at": self.started_at,
+            "connected_at": self.connected_at,
+            "finished_at": self.finished_at,
+        }
+
+
+startup_restore = StartupRestore()
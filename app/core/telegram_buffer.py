@@ -0,0 +1,107 @@
+# app/core/telegram_buffer.py
+import os
+import struct
+import time
+
+from xknx.dpt import DPTArray, DPTBinary
+from xknx.telegram import Telegram, TelegramDirection
+from xknx.telegram.address import GroupAddress, IndividualAddress
+from xknx.telegram.apci import GroupValueRead, GroupValueResponse, GroupValueWrite
+
+KNX_TELEGRAM_BUFFER_SIZE = int(os.getenv("KNX_TELEGRAM_BUFFER_SIZE", "10000"))
+
+# timestamp, source IA, destination GA, flags, payload length, payload
+_RECORD = struct.Struct("<dHHBB14s")
+MAX_PAYLOAD = 14
+
+# flags: bits 0-1 APCI, bit 6 outgoing, bit 7 DPTBinary (payload is the 6-bit value)
+_APCI_CODES = {GroupValueRead: 0, GroupValueResponse: 1, GroupValueWrite: 2}
+_APCI_NAMES = {0: "GroupValueRead", 1: "GroupValueResponse", 2: "GroupValueWrite"}
+_FLAG_OUTGOING = 0x40
+_FLAG_BINARY = 0x80
+
+
+class TelegramRingBuffer:
+    """
+    Fixed-size ring of group telegrams packed into one preallocated bytearray
+    (28 bytes per telegram), newest overwriting oldest.
+    """
+
+    def __init__(self, capacity: int = KNX_TELEGRAM_BUFFER_SIZE):
+        self.capacity = max(1, capacity)
+        self._data = bytearray(self.capacity * _RECORD.size)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def record(self, telegram: Telegram):
+        if not isinstance(telegram.destination_address, GroupAddress):
+            return
+        apci = _APCI_CODES.get(type(telegram.payload))
+        if apci is None:
+            return
+
+        flags = apci
+        if telegram.direction == TelegramDirection.OUTGOING:
+            flags |= _FLAG_OUTGOING
+
+        payload = b""
+        value = getattr(telegram.payload, "value", None)
+        if isinstance(value, DPTBinary):
+            flags |= _FLAG_BINARY
+            payload = bytes((value.value,))
+        elif isinstance(value, DPTArray):
+            payload = bytes(value.value[:MAX_PAYLOAD])
+
+        _RECORD.pack_into(
+            self._data,
+            self._next * _RECORD.size,
+            time.time(),
+            telegram.source_address.raw,
+            telegram.destination_address.raw,
+            flags,
+            len(payload),
+            payload,
+        )
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def since(
+        self,
+        seconds: float,
+        group_address: str | None = None,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """Telegrams from the last `seconds`, oldest first, optionally for one group address."""
+        cutoff = time.time() - seconds
+        wanted = GroupAddress(group_address).raw if group_address else None
+
+        records = []
+        for i in range(self._count):
+            slot = (self._next - 1 - i) % self.capacity
+            timestamp, src, dst, flags, length, payload = _RECORD.unpack_from(
+                self._data, slot * _RECORD.size
+            )
+            if timestamp < cutoff:
+                break
+            if wanted is not None and dst != wanted:
+                continue
+            records.append(
+                {
+                    "timestamp": timestamp,
+                    "source": str(IndividualAddress(src)),
+                    "destination": str(GroupAddress(dst)),
+                    "direction": "outgoing" if flags & _FLAG_OUTGOING else "incoming",
+                    "apci": _APCI_NAMES[flags & 0x03],
+                    "payload": (
+                        payload[0] if flags & _FLAG_BINARY else payload[:length].hex()
+                    ) if length else None,
+                }
+            )
+            if limit and len(records) >= limit:
+                break
+
+        records.reverse()
+        return records
@@ -0,0 +1,108 @@
+# app/core/telegram_logging.py
+import atexit
+import logging
+import os
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from xknx.core.group_address_dpt import GroupAddressDPT
+from xknx.telegram import Telegram, TelegramDecodedData
+
+# Telegram lines are logged at INFO; set WARNING or OFF to silence them (nothing is decoded then)
+KNX_TELEGRAM_LOG_LEVEL = os.getenv("KNX_TELEGRAM_LOG_LEVEL", "INFO").upper()
+# At most this many lines per group address per second (0 = unlimited)
+KNX_TELEGRAM_LOG_RATE = int(os.getenv("KNX_TELEGRAM_LOG_RATE", "5"))
+# Log only every Nth telegram per group address (1 = all)
+KNX_TELEGRAM_LOG_SAMPLE = max(1, int(os.getenv("KNX_TELEGRAM_LOG_SAMPLE", "1")))
+
+telegram_logger = logging.getLogger("ivcore.telegrams")
+ga_dpt_decoder = GroupAddressDPT()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueue the raw record; message formatting happens on the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+
+def _configure() -> QueueListener:
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    listener = QueueListener(log_queue, stream, respect_handler_level=False)
+
+    telegram_logger.handlers = [_DeferredQueueHandler(log_queue)]
+    telegram_logger.propagate = False
+    if KNX_TELEGRAM_LOG_LEVEL == "OFF":
+        telegram_logger.setLevel(logging.CRITICAL + 1)
+    else:
+        telegram_logger.setLevel(KNX_TELEGRAM_LOG_LEVEL)
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+_listener = _configure()
+
+
+class _PerAddressLimiter:
+    """Sampling plus a fixed one-second window per group address."""
+
+    def __init__(self, rate: int, sample: int):
+        self.rate = rate
+        self.sample = sample
+        self._windows: dict[str, list] = {}  # dst -> [window_start, logged, suppressed, seen]
+
+    def allow(self, dst: str) -> tuple[bool, int]:
+        """Returns (log this one?, number suppressed since the last logged line)."""
+        now = time.monotonic()
+        window = self._windows.get(dst)
+        if window is None:
+            window = self._windows[dst] = [now, 0, 0, 0]
+        elif now - window[0] >= 1.0:
+            window[0] = now
+            window[1] = 0
+
+        window[3] += 1
+        if (window[3] - 1) % self.sample or (self.rate and window[1] >= self.rate):
+            window[2] += 1
+            return False, 0
+
+        window[1] += 1
+        suppressed, window[2] = window[2], 0
+        return True, suppressed
+
+
+_limiter = _PerAddressLimiter(KNX_TELEGRAM_LOG_RATE, KNX_TELEGRAM_LOG_SAMPLE)
+
+
+def log_knx_telegrams(telegram: Telegram) -> None:
+    # Level check first: when disabled we don't even decode
+    if not telegram_logger.isEnabledFor(logging.INFO):
+        return
+
+    dst = telegram.destination_address
+    allowed, suppressed = _limiter.allow(str(dst))
+    if not allowed:
+        return
+
+    decoded_value = None
+    try:
+        if telegram.decoded_data is None:
+            ga_dpt_decoder.set_decoded_data(telegram)
+        if isinstance(telegram.decoded_data, TelegramDecodedData):
+            decoded_value = telegram.decoded_data.value
+    except Exception as e:
+        decoded_value = f"Decode failed: {e}"
+
+    telegram_logger.info(
+        "📨 Telegram | %s → %s | Raw: %s | Decoded: %s%s",
+        telegram.source_address,
+        dst,
+        telegram.payload,
+        decoded_value,
+        f" | {suppressed} suppressed" if suppressed else "",
+    )
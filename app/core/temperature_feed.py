@@ -0,0 +1,269 @@
+# app/core/temperature_feed.py
+import asyncio
+import os
+import time
+
+from knx_control import get_room_instance_by_id
+from app.core.read_scheduler import READ_PRIORITY_STALE
+
+# The sensor callback pushes changes; the bus is only read when it has been quiet this long
+TEMPERATURE_FALLBACK_POLL_SECONDS = float(os.getenv("TEMPERATURE_FALLBACK_POLL_SECONDS", "60"))
+# How often the room's sensor is looked up again: before the room is connected,
+# while it has no sensor, and to follow a new sensor object after a reconnect
+TEMPERATURE_RETRY_SECONDS = 3.0
+# /knx-runtime-temperatures: values younger than this are served as-is. The default
+# matches xknx's sync_state interval (60 min), so a sensor that is quiet but
+# tracked isn't read on every call
+TEMPERATURE_MAX_AGE_SECONDS = float(os.getenv("TEMPERATURE_MAX_AGE_SECONDS", "3600"))
+# Stale sensors are synced at most this many at a time (across all requests). The
+# timeout bounds the whole response, waiting for a slot included; syncs still
+# running then finish in the background
+TEMPERATURE_SYNC_CONCURRENCY = int(os.getenv("TEMPERATURE_SYNC_CONCURRENCY", "8"))
+TEMPERATURE_SYNC_TIMEOUT = float(os.getenv("TEMPERATURE_SYNC_TIMEOUT", "3"))
+
+_sync_semaphore = asyncio.Semaphore(TEMPERATURE_SYNC_CONCURRENCY)
+# room_id -> running sync, so repeated calls join it instead of reading again
+_syncs: dict[str, asyncio.Task] = {}
+
+
+def find_room_sensor(room):
+    """The room's temperature sensor: its first Sensor device, picked when devices load."""
+    return room.temperature_sensor
+
+
+def temperature_message(room_id, sensor) -> dict:
+    temp = sensor.resolve_state()
+    return {
+        "room_id": room_id,
+        "sensor": sensor.name,
+        "temperature": temp if temp is not None else "no data",
+    }
+
+
+def _offer(outbox: asyncio.Queue, message: dict):
+    # Clients only care about the latest reading
+    if outbox.full():
+        try:
+            outbox.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    outbox.put_nowait(message)
+
+
+def sensor_age(room, sensor) -> float | None:
+    """Seconds since the sensor's address last carried a value, None if never seen."""
+    remote_value = sensor.sensor_value
+    address = remote_value.group_address_state or remote_value.group_address
+    entry = room.ga_values.get(address) if address is not None else None
+    return time.time() - entry[0] if entry is not None else None
+
+
+async def _sync_sensor(room, sensor, timeout: float) -> str | None:
+    """Bounded bus read; returns an error string instead of raising."""
+    try:
+        async with _sync_semaphore:
+            if room.connection is None:
+                return "not connected"
+            await asyncio.wait_for(
+                room.connection.read_scheduler.sync_device(sensor, READ_PRIORITY_STALE), timeout
+            )
+        return None
+    except asyncio.TimeoutError:
+        return f"sync timed out after {timeout}s"
+    except Exception as e:
+        return f"sync failed: {e}"
+
+
+def _start_sync(room_id, room, sensor, timeout: float) -> asyncio.Task:
+    task = _syncs.get(room_id)
+    if task is None:
+        task = _syncs[room_id] = asyncio.create_task(_sync_sensor(room, sensor, timeout))
+        task.add_done_callback(lambda _: _syncs.pop(room_id, None))
+    return task
+
+
+async def collect_room_temperatures(
+    rooms: dict,
+    max_age: float = TEMPERATURE_MAX_AGE_SECONDS,
+    sync: bool = True,
+    timeout: float = TEMPERATURE_SYNC_TIMEOUT,
+) -> dict:
+    """
+    Current temperature of every room. Sensors keep themselves up to date
+    (sync_state), so most answers come straight from memory; only sensors
+    with no value younger than `max_age` are read from the bus, in parallel.
+    The call waits at most `timeout` for them; those not back by then are
+    answered from memory (with their age) and finish in the background.
+    """
+    response = {}
+    stale = {}
+    for room_id, room in rooms.items():
+        sensor = find_room_sensor(room)
+        if sensor is None:
+            response[room_id] = {"error": f"No sensor found in Room {room_id}"}
+            continue
+        age = sensor_age(room, sensor)
+        if sync and (age is None or age > max_age):
+            stale[room_id] = (room, sensor)
+            continue
+        response[room_id] = _temperature_entry(sensor, age)
+
+    if stale:
+        tasks = {
+            room_id: _start_sync(room_id, room, sensor, timeout)
+            for room_id, (room, sensor) in stale.items()
+        }
+        await asyncio.wait(tasks.values(), timeout=timeout)
+        for room_id, (room, sensor) in stale.items():
+            task = tasks[room_id]
+            entry = _temperature_entry(sensor, sensor_age(room, sensor))
+            if task.done():
+                error = task.result()
+                entry["synced"] = error is None
+                if error is not None:
+                    entry["error"] = error
+            else:
+                entry["synced"] = False
+                entry["error"] = "sync still running"
+            response[room_id] = entry
+
+    return response
+
+
+def _temperature_entry(sensor, age: float | None) -> dict:
+    temp = sensor.resolve_state()
+    return {
+        "device": sensor.name,
+        "temperature": temp if temp is not None else "no data",
+        "age": round(age, 1) if age is not None else None,
+    }
+
+
+class RoomTemperatureFeed:
+    """
+    One per watched room, shared by all of its /ws/temperature clients.
+    Changes are pushed from the sensor's update callback; a bus read only
+    happens when the sensor has been silent for the fallback interval.
+    """
+
+    def __init__(self, room_id):
+        self.room_id = room_id
+        self.subscribers: set[asyncio.Queue] = set()
+        self.room = None
+        self.sensor = None
+        self.last_message: dict | None = None
+        self.last_update = 0.0
+        self.bus_reads = 0
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._bind(None)
+
+    def add(self, outbox: asyncio.Queue):
+        self.subscribers.add(outbox)
+        if self.last_message is not None:
+            _offer(outbox, self.last_message)
+
+    def _publish(self, message: dict):
+        self.last_message = message
+        for outbox in self.subscribers:
+            _offer(outbox, message)
+
+    def _bind(self, sensor):
+        """Follow the room's current sensor object (it is replaced on reconnect)."""
+        if sensor is self.sensor:
+            return
+        if self.sensor is not None:
+            self.sensor.unregister_device_updated_cb(self._on_sensor_update)
+        self.sensor = sensor
+        if sensor is not None:
+            sensor.register_device_updated_cb(self._on_sensor_update)
+
+    def _on_sensor_update(self, sensor):
+        self.last_update = time.monotonic()
+        message = temperature_message(self.room_id, sensor)
+        if message != self.last_message:
+            self._publish(message)
+
+    def _lookup(self) -> dict | None:
+        """Binds the sensor, or returns the error message to send instead."""
+        room = get_room_instance_by_id(self.room_id)
+        self.room = room
+        if room is None:
+            self._bind(None)
+            return {"error": f"Room {self.room_id} is not configured"}
+        sensor = find_room_sensor(room)
+        self._bind(sensor)
+        if sensor is None:
+            return {"error": f"No sensor found in Room {self.room_id}"}
+        return None
+
+    async def _run(self):
+        while True:
+            error = self._lookup()
+            if error is not None:
+                if error != self.last_message:
+                    self._publish(error)
+                await asyncio.sleep(TEMPERATURE_RETRY_SECONDS)
+                continue
+
+            quiet = time.monotonic() - self.last_update
+            if self.last_message is None or quiet >= TEMPERATURE_FALLBACK_POLL_SECONDS:
+                try:
+                    self.bus_reads += 1
+                    await self.room.connection.read_scheduler.sync_device(
+                        self.sensor, READ_PRIORITY_STALE
+                    )
+                except Exception as e:
+                    print(f"⚠️ Temperature read failed for Room {self.room_id}: {e}")
+                self.last_update = time.monotonic()
+                # Also serves as a keep-alive when the value hasn't changed
+                self._publish(temperature_message(self.room_id, self.sensor))
+                quiet = 0.0
+
+            # Wake up often enough to follow a sensor replaced by a reconnect or reconcile
+            await asyncio.sleep(min(TEMPERATURE_RETRY_SECONDS, max(0.1, TEMPERATURE_FALLBACK_POLL_SECONDS - quiet)))
+
+
+class TemperatureFeedManager:
+    """Starts a room's feed on its first subscriber and stops it after the last one leaves."""
+
+    def __init__(self):
+        self.feeds: dict[str, RoomTemperatureFeed] = {}
+
+    def subscribe(self, room_id) -> asyncio.Queue:
+        outbox: asyncio.Queue = asyncio.Queue(maxsize=1)
+        feed = self.feeds.get(room_id)
+        if feed is None:
+            feed = self.feeds[room_id] = RoomTemperatureFeed(room_id)
+            feed.start()
+        feed.add(outbox)
+        return outbox
+
+    def unsubscribe(self, room_id, outbox: asyncio.Queue):
+        feed = self.feeds.get(room_id)
+        if feed is None:
+            return
+        feed.subscribers.discard(outbox)
+        if not feed.subscribers:
+            feed.stop()
+            del self.feeds[room_id]
+
+    def stats(self) -> dict:
+        return {
+            room_id: {
+                "subscribers": len(feed.subscribers),
+                "sensor": feed.sensor.name if feed.sensor is not None else None,
+                "bus_reads": feed.bus_reads,
+            }
+            for room_id, feed in self.feeds.items()
+        }
+
+
+temperature_feeds = TemperatureFeedManager()
@@ -0,0 +1,71 @@
+# app/core/update_coalescer.py
+import asyncio
+import os
+from typing import Callable, Hashable
+
+# Window in milliseconds; 0 turns coalescing off
+DEVICE_UPDATE_COALESCE_MS = float(os.getenv("DEVICE_UPDATE_COALESCE_MS", "50"))
+
+
+class DeviceUpdateCoalescer:
+    """
+    Rate-limits updates per key to one emit per window.
+    The first update of a burst is emitted right away; updates arriving
+    inside the window only replace the pending one, which is emitted once
+    when the window closes. The final state of a burst is never lost.
+    """
+
+    def __init__(self, window_ms: float = DEVICE_UPDATE_COALESCE_MS):
+        self.window = max(0.0, window_ms) / 1000
+        self._open_windows: set[Hashable] = set()
+        self._pending: dict[Hashable, Callable[[], None]] = {}
+        self.received = 0
+        self.coalesced = 0
+        self.emitted = 0
+
+    def push(self, key: Hashable, emit: Callable[[], None]):
+        self.received += 1
+        if self.window <= 0:
+            self._emit(emit)
+            return
+
+        if key in self._open_windows:
+            if key in self._pending:
+                self.coalesced += 1
+            self._pending[key] = emit
+            return
+
+        self._emit(emit)
+        self._open_window(key)
+
+    def _open_window(self, key: Hashable):
+        self._open_windows.add(key)
+        asyncio.get_running_loop().call_later(self.window, self._close_window, key)
+
+    def _close_window(self, key: Hashable):
+        emit = self._pending.pop(key, None)
+        if emit is None:
+            self._open_windows.discard(key)
+            return
+        self._emit(emit)
+        # Keep throttling while the burst continues
+        asyncio.get_running_loop().call_later(self.window, self._close_window, key)
+
+    def _emit(self, emit: Callable[[], None]):
+        self.emitted += 1
+        try:
+            emit()
+        except Exception as e:
+            print(f"⚠️ Error emitting device update: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window * 1000,
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "emitted": self.emitted,
+            "pending": len(self._pending),
+        }
+
+
+device_update_coalescer = DeviceUpdateCoalescer()
@@ -1,62 +1,277 @@
 # app/core/ws_broadcaster.py
+import asyncio
+import itertools
+import os
+from collections import OrderedDict, defaultdict
+
 from fastapi import WebSocket
-from xknx.telegram.address import GroupAddress
-from collections import defaultdict
 
+from app.core.serialization import dumps_text
+
+# Per-client outbound queue bound and what to do when a client can't keep up:
+#   "coalesce"    - keep only the latest pending state per device, drop the oldest on overflow
+#   "drop_oldest" - plain FIFO, drop the oldest pending message on overflow
+WS_CLIENT_QUEUE_SIZE = int(os.getenv("WS_CLIENT_QUEUE_SIZE", "64"))
+WS_DROP_POLICY = os.getenv("WS_DROP_POLICY", "coalesce").lower()
+# After the first full state, send only the values that changed ({"changed": {...}} frames)
+WS_DELTA_ENCODING = os.getenv("WS_DELTA_ENCODING", "1") not in ("0", "false", "False")
+
+
+class DropOldestQueue(asyncio.Queue):
+    """
+    Bounded asyncio.Queue for producers that must never block (telegram
+    callbacks): put_nowait drops the oldest item instead of raising QueueFull.
+    """
+
+    def __init__(self, maxsize: int = WS_CLIENT_QUEUE_SIZE):
+        super().__init__(maxsize=max(1, maxsize))
+        self.dropped = 0
+
+    def put_nowait(self, item):
+        if self.full():
+            self.get_nowait()
+            self.dropped += 1
+        super().put_nowait(item)
+
+
+class ClientOutbox:
+    """
+    Bounded outbound queue plus a dedicated writer task for one WebSocket.
+    A slow client only ever fills its own queue. `synced` holds the devices
+    for which the client has every frame since a full state, which is what
+    a delta frame builds on. Dropping a frame takes the device out again,
+    discards its other queued frames and leaves it in `resync`: the writer
+    then sends one full state, built from `full_frame(key)` when it goes out.
+    """
+
+    _seq = itertools.count()
+
+    def __init__(self, ws: WebSocket, maxsize: int, policy: str, on_dead=None, full_frame=None):
+        self.ws = ws
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.pending: OrderedDict = OrderedDict()
+        self.synced: set = set()
+        self.resync: OrderedDict = OrderedDict()
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.resynced = 0
+        self._ready = asyncio.Event()
+        self._on_dead = on_dead
+        self._full_frame = full_frame
+        self._task = asyncio.create_task(self._writer())
+
+    def wants_delta(self, key) -> bool:
+        # A queued frame that gets coalesced away would take its changes with it
+        return key in self.synced and not (self.policy == "coalesce" and key in self.pending)
 
-def serialize_state(state: dict) -> dict:
-    """Convert all GroupAddress or other custom types to strings or primitives."""
+    def offer(self, key, payload: str, full: bool = True):
+        if full:
+            self.synced.add(key)
+            self.resync.pop(key, None)
+        if self.policy == "coalesce" and key in self.pending:
+            # Newer state for the same device replaces the queued one in place
+            self.pending[key] = (key, payload)
+            self.coalesced += 1
+            return
 
-    def serialize_value(val):
-        if isinstance(val, GroupAddress):
-            return str(val)
-        if isinstance(val, dict):
-            return serialize_state(val)
-        if isinstance(val, list):
-            return [serialize_value(v) for v in val]
-        return val
+        slot = key if self.policy == "coalesce" else next(self._seq)
+        if len(self.pending) >= self.maxsize:
+            _, (dropped_key, _) = self.pending.popitem(last=False)
+            self.dropped += 1
+            self._drop(dropped_key)
+            if dropped_key == key:
+                if not full:
+                    # This delta builds on the dropped frame; the resync carries it
+                    self._ready.set()
+                    return
+                self.resync.pop(key, None)
+                self.synced.add(key)
+        self.pending[slot] = (key, payload)
+        self._ready.set()
 
-    return {k: serialize_value(v) for k, v in state.items()}
+    def _drop(self, key):
+        """Frames after a lost one can't be applied: replace them all with a full state."""
+        self.synced.discard(key)
+        for slot in [slot for slot, (queued_key, _) in self.pending.items() if queued_key == key]:
+            del self.pending[slot]
+            self.dropped += 1
+        self.resync[key] = None
 
+    async def _writer(self):
+        try:
+            while True:
+                await self._ready.wait()
+                while self.pending or self.resync:
+                    if self.resync:
+                        # Built now from the last published values, which later deltas are taken against
+                        key, _ = self.resync.popitem(last=False)
+                        payload = self._full_frame(key) if self._full_frame else None
+                        if payload is None:
+                            continue
+                        self.synced.add(key)
+                        self.resynced += 1
+                    else:
+                        _, (_, payload) = self.pending.popitem(last=False)
+                    await self.ws.send_text(payload)
+                    self.sent += 1
+                self._ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Error sending to WebSocket: {e}")
+            if self._on_dead:
+                self._on_dead(self.ws)
 
-from collections import defaultdict
+    def close(self):
+        self._task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self.pending),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "resynced": self.resynced,
+        }
 
 
 class DeviceWebSocketBroadcaster:
-    def __init__(self):
+    def __init__(
+        self,
+        queue_size: int = WS_CLIENT_QUEUE_SIZE,
+        policy: str = WS_DROP_POLICY,
+        delta: bool = WS_DELTA_ENCODING,
+    ):
         self.subscriptions = defaultdict(set)
+        self.outboxes: dict[WebSocket, ClientOutbox] = {}
+        self.queue_size = queue_size
+        self.policy = policy
+        self.delta = delta
+        # Dynamic values of the last publish per (room, device), what deltas are taken against
+        self.last_published: dict[tuple, dict] = {}
+        # The published record per (room, device), for the static part of full states sent after a drop
+        self.records: dict[tuple, object] = {}
+        self.full_frames = 0
+        self.delta_frames = 0
+        self.unchanged = 0
+        # Totals survive client disconnects
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.resynced = 0
 
     def subscribe(self, room_id: str, device_name: str, ws: WebSocket):
         self.subscriptions[(room_id, device_name)].add(ws)
+        if ws not in self.outboxes:
+            self.outboxes[ws] = ClientOutbox(
+                ws, self.queue_size, self.policy, on_dead=self.unsubscribe, full_frame=self.full_frame
+            )
 
     def unsubscribe(self, ws: WebSocket):
         for key in list(self.subscriptions):
             self.subscriptions[key].discard(ws)
             if not self.subscriptions[key]:
                 del self.subscriptions[key]
+                self.last_published.pop(key, None)
+                self.records.pop(key, None)
+
+        outbox = self.outboxes.pop(ws, None)
+        if outbox is not None:
+            self.sent += outbox.sent
+            self.dropped += outbox.dropped
+            self.coalesced += outbox.coalesced
+            self.resynced += outbox.resynced
+            outbox.close()
 
-    async def broadcast(self, room_id: str, device_name: str, state: dict):
+    def reset(self, room_id: str, device_name: str):
+        """
+        The device's record was rebuilt: forget what was published for it,
+        so every subscriber gets a full state next.
+        """
         key = (room_id, device_name)
-        dead = set()
-
-        for ws in self.subscriptions.get(key, []):
-            try:
-                await ws.send_json(
-                    {
-                        "device": device_name,
-                        "room_id": room_id,
-                        "state": serialize_state(state),
-                    }
-                )
-            except Exception as e:
-                print(f"⚠️ Error sending to WebSocket: {e}")
-                dead.add(ws)
-
-        # Remove dead sockets
-        for ws in dead:
-            self.subscriptions[key].discard(ws)
-        if not self.subscriptions[key]:
-            del self.subscriptions[key]
+        self.last_published.pop(key, None)
+        self.records.pop(key, None)
+        for outbox in self.outboxes.values():
+            outbox.synced.discard(key)
+            outbox.resync.pop(key, None)
+
+    def has_subscribers(self, room_id: str, device_name: str) -> bool:
+        return bool(self.subscriptions.get((room_id, device_name)))
+
+    def publish(self, room_id: str, device_name: str, record):
+        """
+        Hand a device's state (a DeviceState record) to every subscriber's
+        outbox. Clients that are in sync get only the changed values, the
+        others the full state; each frame is serialized once. Never blocks.
+        """
+        key = (room_id, device_name)
+        sockets = self.subscriptions.get(key)
+        if not sockets:
+            return
+
+        values = record.values
+        previous = self.last_published.get(key)
+        self.last_published[key] = values
+        self.records[key] = record
+        changed = values
+        if previous is not None:
+            changed = {field: value for field, value in values.items() if previous.get(field) != value}
+
+        full = delta = None
+        for ws in sockets:
+            outbox = self.outboxes.get(ws)
+            if outbox is None:
+                continue
+            if previous is not None and outbox.wants_delta(key):
+                if not changed:
+                    self.unchanged += 1
+                    continue
+                if self.delta:
+                    if delta is None:
+                        delta = dumps_text({"device": device_name, "room_id": room_id, "changed": changed})
+                    outbox.offer(key, delta, full=False)
+                    self.delta_frames += 1
+                    continue
+            if full is None:
+                full = dumps_text({"device": device_name, "room_id": room_id, "state": record.as_dict()})
+            outbox.offer(key, full)
+            self.full_frames += 1
+
+    def full_frame(self, key: tuple) -> str | None:
+        """
+        Full state as of the last publish. The record itself can be ahead of
+        it (get_device_state() refreshes it too), and a frame built from
+        that would not match the deltas that follow.
+        """
+        record = self.records.get(key)
+        values = self.last_published.get(key)
+        if record is None or values is None:
+            return None
+        room_id, device_name = key
+        return dumps_text({"device": device_name, "room_id": room_id, "state": {**record.static, **values}})
+
+    async def broadcast(self, room_id: str, device_name: str, record):
+        self.publish(room_id, device_name, record)
+
+    def stats(self) -> dict:
+        clients = [outbox.stats() for outbox in self.outboxes.values()]
+        return {
+            "policy": self.policy,
+            "delta_encoding": self.delta,
+            "full_frames": self.full_frames,
+            "delta_frames": self.delta_frames,
+            "unchanged": self.unchanged,
+            "queue_size": self.queue_size,
+            "clients": len(clients),
+            "subscriptions": len(self.subscriptions),
+            "queued": sum(c["queued"] for c in clients),
+            "sent": self.sent + sum(c["sent"] for c in clients),
+            "dropped": self.dropped + sum(c["dropped"] for c in clients),
+            "coalesced": self.coalesced + sum(c["coalesced"] for c in clients),
+            "resynced": self.resynced + sum(c["resynced"] for c in clients),
+        }
 
 
 device_ws_broadcaster = DeviceWebSocketBroadcaster()
@@ -19,6 +19,7 @@ class DeviceConfig(BaseModel):
 class RoomDefinition(BaseModel):
     room_id: str
     ip: str
+    connection_type: str | None = None
     devices: list[DeviceConfig]
 
 
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from knx_control import get_all_rooms
+from app.core.update_coalescer import device_update_coalescer
 
 router = APIRouter(tags=["KNX Runtime"])
 
@@ -20,3 +21,12 @@ def get_runtime_devices():
             all_devices.append(device_with_room)
 
     return all_devices
+
+
+@router.get(
+    "/devices-runtime/update-stats",
+    summary="Device update coalescing counters",
+    description="How many device updates were received, coalesced within the window, and emitted to subscribers."
+)
+def get_device_update_stats():
+    return device_update_coalescer.stats()
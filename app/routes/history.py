@@ -0,0 +1,56 @@
+# app/routes/history.py
+import time
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.core.history_store import device_history_writer
+from app.core.serialization import KNXJSONResponse
+
+router = APIRouter(tags=["Device History"])
+
+
+@router.get(
+    "/history/stats",
+    summary="Device history writer counters",
+    description="Buffered, written and dropped sample counts of the SQLite history writer."
+)
+def get_history_stats():
+    return device_history_writer.stats()
+
+
+@router.get(
+    "/history/{room_id}/{device_name}",
+    summary="Get a device's state history",
+    description=(
+        "Returns min/max/avg/count per `bucket` seconds for one device between `start` and `end` "
+        "(unix timestamps; default is the last 24 hours). Older ranges are served from hourly rollups."
+    )
+)
+async def get_device_history(
+    room_id: str,
+    device_name: str,
+    start: float | None = Query(None, description="Unix timestamp, default end - 24h"),
+    end: float | None = Query(None, description="Unix timestamp, default now"),
+    bucket: int = Query(300, ge=1, le=30 * 86400, description="Bucket size in seconds"),
+):
+    if not device_history_writer.running:
+        raise HTTPException(status_code=503, detail="Device history is not enabled")
+
+    end = end if end is not None else time.time()
+    start = start if start is not None else end - 86400
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    try:
+        points = await device_history_writer.query(room_id, device_name, start, end, bucket)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"History query failed: {e}")
+
+    return KNXJSONResponse({
+        "room_id": room_id,
+        "device": device_name,
+        "start": start,
+        "end": end,
+        "bucket": bucket,
+        "points": points,
+    })
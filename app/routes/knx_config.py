@@ -1,16 +1,16 @@
 # /app/routes/knx_config.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 import asyncio
 from typing import List, Dict, Optional
 import os, json
-from knx_control import update_room_configuration, get_current_configuration, get_all_rooms, get_temperature_for_room
+from knx_control import update_room_configuration, get_current_configuration, get_all_rooms
+from app.core.temperature_feed import TEMPERATURE_MAX_AGE_SECONDS, collect_room_temperatures
+from app.core.startup_restore import KNX_RUNTIME_CONFIG_PATH as CONFIG_PATH
 
 router = APIRouter()
 
-UPLOAD_DIR = "./app/uploads"
-CONFIG_PATH = os.path.join(UPLOAD_DIR, "knx_runtime_config.json")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+os.makedirs(os.path.dirname(CONFIG_PATH) or ".", exist_ok=True)
 
 
 # Define a Pydantic model for a single device
@@ -30,6 +30,8 @@ class KNXDeviceConfig(BaseModel):
 class RoomConfig(BaseModel):
     room_id: str
     ip: str
+    # "tunneling" (default) or "routing"; rooms on the same gateway share one connection
+    connection_type: str | None = None
     devices: List[KNXDeviceConfig]
 
 
@@ -58,38 +60,22 @@ def load_knx_config():
         return json.load(f)
 
 @router.get("/knx-runtime-temperatures", tags=["Runtime Commands"])
-async def read_all_temperatures():
-    # Grab the dict of { room_id: RoomKNX instance }
-    rooms = get_all_rooms()  # from knx_control.py :contentReference[oaicite:0]{index=0}
-
-    # Kick off a temperature-read task for each room
-    tasks = {
-        room_id: asyncio.create_task(get_temperature_for_room(room_id))
-        for room_id in rooms
-    }
-
-    # Await them all, capturing any per-room exceptions
-    results = await asyncio.gather(*tasks.values(), return_exceptions=True)
-
-    # Map back into your response shape
-    response = {}
-    for room_id, result in zip(tasks.keys(), results):
-        if isinstance(result, Exception):
-            response[room_id] = {"error": str(result)}
-        else:
-            # get_temperature_for_room returns {"room_id", "sensor", "temperature"}
-            response[room_id] = {
-                "device": result["sensor"],
-                "temperature": result["temperature"],
-            }
-
-    return response
+async def read_all_temperatures(
+    max_age: float = Query(
+        TEMPERATURE_MAX_AGE_SECONDS, ge=0, description="Re-read sensors whose value is older than this (seconds)"
+    ),
+    sync: bool = Query(True, description="Set false to answer from memory only, never touching the bus"),
+):
+    # Current sensor values for every room; only stale ones go to the bus, in parallel
+    return await collect_room_temperatures(get_all_rooms(), max_age=max_age, sync=sync)
 
 # ✅ POST: Apply config to runtime (best-effort)
 # app/routes/knx_config.py
 
 @router.post("/knx-config-runtime", tags=["Development"])
-async def configure_knx_runtime():
+async def configure_knx_runtime(
+    full_rebuild: bool = Query(False, description="Reconnect every room instead of applying only the differences"),
+):
     if not os.path.exists(CONFIG_PATH):
         raise HTTPException(status_code=404, detail="No saved configuration found")
 
@@ -99,7 +85,7 @@ async def configure_knx_runtime():
 
     # 2) Apply in one shot and get back a summary
     try:
-        result = await update_room_configuration(config_data["rooms"])
+        result = await update_room_configuration(config_data["rooms"], full_rebuild=full_rebuild)
     except Exception as e:
         # Unexpected errors (e.g. file parse, code bug)
         raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
@@ -112,7 +98,7 @@ async def configure_knx_runtime():
     # 4) Otherwise everything is up
     return {
         "status": "✅ Configuration applied",
-        "details": result,   # {"status":"complete","configured":12,"failed_rooms":[]}
+        "details": result,   # {"status":"complete","configured":12,"failed_rooms":[],"device_changes":{...},...}
     }
 
 
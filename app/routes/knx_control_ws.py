@@ -1,55 +1,58 @@
+import asyncio
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from knx_control import get_room_instance_by_id
+from app.core.control_protocol import ControlSession
+from app.core.serialization import send_json
 
 router = APIRouter(tags=["KNX WebSocket Control"])
 
+# Frames: {"id": "r1", "device": "Light1", "action": "set_brightness", "value": 40},
+# a list of those, or {"batch": [...]}. Text frames are JSON, binary frames msgpack.
+# Each command is acked with its id once the telegram has gone out (or failed).
 @router.websocket("/ws/control/{room_id}")
 async def knx_device_control_ws(websocket: WebSocket, room_id: str):
     await websocket.accept()
     room = get_room_instance_by_id(room_id)
 
     if not room:
-        await websocket.send_json({"error": f"Room {room_id} not found"})
+        await send_json(websocket, {"error": f"Room {room_id} not found"})
         await websocket.close()
         return
 
-    try:
-        while True:
-            msg = await websocket.receive_json()
-            device_name = msg.get("device")
-            action = msg.get("action")
-            value = msg.get("value")
-
-            if not device_name or not action:
-                await websocket.send_json({"error": "Missing 'device' or 'action'"})
-                continue
+    session = ControlSession(room)
 
-            device = next((d for d in room.devices if d.name == device_name), None)
-            if not device:
-                await websocket.send_json({"error": f"Device '{device_name}' not found"})
-                continue
+    # Acks are written here so reading the next frame never waits on a device action
+    async def writer():
+        try:
+            while True:
+                kind, payload = session.encode(await session.outbox.get())
+                if kind == "bytes":
+                    await websocket.send_bytes(payload)
+                else:
+                    await websocket.send_text(payload)
+        finally:
+            # A dead writer must not leave the reader waiting; receive() then sees the disconnect
+            session.outbox.has_room.set()
 
-            if not hasattr(device, action):
-                await websocket.send_json({"error": f"Device '{device_name}' has no action '{action}'"})
-                continue
+    writer_task = asyncio.create_task(writer())
 
+    try:
+        while True:
+            # Backpressure: a client that doesn't read its acks isn't read either
+            await session.outbox.has_room.wait()
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
             try:
-                method = getattr(device, action)
-                if callable(method):
-                    if value is not None:
-                        await method(value)
-                    else:
-                        await method()
-                    await websocket.send_json({
-                        "status": "ok",
-                        "device": device_name,
-                        "action": action,
-                        "value": value
-                    })
-                else:
-                    await websocket.send_json({"error": f"Attribute '{action}' is not callable"})
+                frame = session.decode(message)
             except Exception as e:
-                await websocket.send_json({"error": str(e)})
+                session.outbox.put_nowait({"status": "error", "error": f"Invalid frame: {e}"})
+                continue
+            session.submit_frame(frame)
 
     except WebSocketDisconnect:
         print(f"❌ Control socket disconnected for room {room_id}")
+    finally:
+        session.close()
+        writer_task.cancel()
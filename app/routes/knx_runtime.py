@@ -1,13 +1,20 @@
+import time
+
 from fastapi import APIRouter, HTTPException, Query
-from xknx.tools import group_value_read, group_value_write, read_group_value
+from xknx.tools import group_value_read, group_value_write
 from knx_control import (
+    get_room_instance_by_id,
     get_xknx_instance,
     get_all_rooms,
-    add_room_instance,
+    get_room_config_by_id,
     remove_room_instance,
     get_current_configuration,
     add_room_instance_by_id,
 )
+from app.utils.knx_device_loader import gateway_pool
+from app.core.ga_batch import KNX_BATCH_MAX_ITEMS, parse_group_value, run_group_batch, summarize_batch
+from app.schemas.knx import GroupValueBatchRequest
+from app.core.serialization import KNXJSONResponse
 
 router = APIRouter(tags=["KNX Runtime"])
 
@@ -15,7 +22,9 @@ router = APIRouter(tags=["KNX Runtime"])
 @router.get(
     "/ga-read",
     summary="Read from a group address",
-    description="Read a value from a KNX group address.",
+    description="Read a value from a KNX group address. With `max_age` the last value seen on the "
+    "bus is returned when it is at most that many seconds old; otherwise a GroupValueRead is sent "
+    "(concurrent reads of the same address share one bus request).",
 )
 async def read_ga(
     room_id: str = Query(..., description="Room ID to use for the KNX connection"),
@@ -23,19 +32,43 @@ async def read_ga(
     dpt: str = Query(
         None, description="Optional DPT type like 'temperature', 'percent', etc."
     ),
+    max_age: float = Query(
+        0, ge=0, description="Accept a cached value up to this many seconds old (0 = always read the bus)"
+    ),
 ):
     try:
-        xknx = get_xknx_instance(room_id)
-        if xknx is None:
+        room = get_room_instance_by_id(room_id)
+        if room is None or room.xknx is None:
             raise HTTPException(
                 status_code=400, detail=f"KNX room {room_id} is not configured"
             )
-        value = await read_group_value(xknx, address, value_type=dpt)
-        return {"room_id": room_id, "address": address, "value": value}
+        entry, cached = await room.ga_values.read(room.connection.read_scheduler, address, max_age)
+        if entry is None:
+            return {"room_id": room_id, "address": address, "value": None, "cached": False}
+        return {
+            "room_id": room_id,
+            "address": address,
+            "cached": cached,
+            **room.ga_values.describe(entry, dpt),
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Read error: {e}")
 
 
+@router.get(
+    "/ga-cache/{room_id}",
+    summary="Group address value cache counters",
+    description="Entries, cache hits, bus reads and coalesced reads of a room's last-known-value cache.",
+)
+def get_ga_cache_stats(room_id: str):
+    room = get_room_instance_by_id(room_id)
+    if room is None:
+        raise HTTPException(status_code=404, detail=f"KNX room {room_id} is not configured")
+    return room.ga_values.stats()
+
+
 @router.post(
     "/ga-write",
     summary="Write to a group address",
@@ -55,30 +88,93 @@ async def write_ga(
             raise HTTPException(
                 status_code=400, detail=f"KNX room {room_id} is not configured"
             )
-        parsed_value = eval(value)  # Replace later with safer parsing
-        group_value_write(xknx, address, parsed_value, value_type=dpt)
+        try:
+            payload = parse_group_value(value, dpt)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid value: {e}")
+        group_value_write(xknx, address, payload)
         return {
             "status": "✅ sent",
             "room_id": room_id,
             "address": address,
-            "value": parsed_value,
+            "value": value,
             "dpt": dpt,
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Write error: {e}")
 
 
+@router.post(
+    "/ga-batch",
+    summary="Read and write many group addresses",
+    description="Runs a list of `{address, value, dpt}` writes (or `op: read` reads) in order through the "
+    "room's KNX connection, `interval_ms` apart, and returns a result per item.",
+)
+async def batch_ga(request: GroupValueBatchRequest):
+    if len(request.items) > KNX_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {KNX_BATCH_MAX_ITEMS} items per batch"
+        )
+    room = get_room_instance_by_id(request.room_id)
+    if room is None or room.xknx is None:
+        raise HTTPException(
+            status_code=400, detail=f"KNX room {request.room_id} is not configured"
+        )
+
+    started = time.perf_counter()
+    results = await run_group_batch(
+        room, [item.model_dump() for item in request.items], request.interval_ms
+    )
+    return {
+        "room_id": request.room_id,
+        **summarize_batch(results, started),
+        "results": results,
+    }
+
+
+@router.get(
+    "/telegrams/{room_id}",
+    summary="Replay recent telegrams",
+    description="Returns the telegrams recorded for a room in the last N seconds, oldest first, "
+    "optionally filtered to one group address.",
+)
+def replay_telegrams(
+    room_id: str,
+    seconds: float = Query(60, gt=0, description="How far back to go"),
+    group_address: str = Query(None, description="Only this group address, e.g. 1/2/3"),
+    limit: int = Query(None, gt=0, description="Return at most this many (newest)"),
+):
+    room = get_room_instance_by_id(room_id)
+    if room is None:
+        raise HTTPException(status_code=404, detail=f"KNX room {room_id} is not configured")
+    try:
+        telegrams = room.telegram_buffer.since(seconds, group_address, limit)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid replay request: {e}")
+    # Returned directly so thousands of telegram dicts skip FastAPI's jsonable_encoder pass
+    return KNXJSONResponse({"room_id": room_id, "count": len(telegrams), "telegrams": telegrams})
+
+
+@router.get(
+    "/knx-gateways",
+    summary="List shared KNX gateway connections",
+    description="Shows each open tunnel or routing connection and the rooms multiplexed over it.",
+)
+def list_gateway_connections():
+    return gateway_pool.stats()
+
+
 @router.post("/connect-room/{room_id}", summary="Manually connect a KNX room")
 async def connect_room(room_id: str):
-    all_rooms = get_all_rooms()
-    config = next((r for r in all_rooms.values() if r.room_id == room_id), None)
-    if not config:
+    if get_room_config_by_id(room_id) is None:
         raise HTTPException(
             status_code=404, detail=f"Room {room_id} not found in stored configuration"
         )
 
     try:
-        await add_room_instance(config)
+        await add_room_instance_by_id(room_id)
         return {"status": f"✅ Room {room_id} connected"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to connect room: {e}")
@@ -1,86 +1,137 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
+from xknx.telegram.address import GroupAddress
 from app.dependencies.ws_auth import websocket_auth
 from knx_control import get_room_instance_by_id
-from xknx.telegram import Telegram
-from xknx.telegram.apci import GroupValueWrite
-from xknx.devices import Device
-from app.utils.device_state_resolvers import DEVICE_RESOLVERS
 import asyncio
-from app.core.ws_broadcaster import device_ws_broadcaster
+import os
+from app.core.ws_broadcaster import device_ws_broadcaster, DropOldestQueue
+from app.core.serialization import send_json, receive_json
 
 router = APIRouter(tags=["KNX WebSocket"])
 
+# Most telegrams one replay request returns (the newest ones)
+WS_REPLAY_MAX_TELEGRAMS = int(os.getenv("WS_REPLAY_MAX_TELEGRAMS", "1000"))
+
+
+def parse_replay(replay) -> tuple[float, list[str | None], int]:
+    """Validate a replay request; returns (seconds, group addresses, limit) or raises ValueError."""
+    if replay is None:
+        replay = {}
+    if not isinstance(replay, dict):
+        raise ValueError("'replay' must be an object")
+    try:
+        seconds = float(replay.get("seconds", 60))
+        limit = int(replay.get("limit", WS_REPLAY_MAX_TELEGRAMS))
+    except (TypeError, ValueError):
+        raise ValueError("'seconds' and 'limit' must be numbers")
+    if seconds <= 0 or limit <= 0:
+        raise ValueError("'seconds' and 'limit' must be positive")
+
+    addresses = replay.get("group_addresses") or [None]
+    if not isinstance(addresses, list):
+        raise ValueError("'group_addresses' must be a list")
+    for address in addresses:
+        if address is None:
+            continue
+        try:
+            GroupAddress(address)
+        except Exception:
+            raise ValueError(f"Invalid group address {address!r}")
+    return seconds, addresses, min(limit, WS_REPLAY_MAX_TELEGRAMS)
+
+# Per device, the first frame is {"device", "room_id", "state": {...}}; after that frames
+# are {"device", "room_id", "changed": {...}} with only the values that changed
+# (full "state" frames again whenever the client fell behind).
 @router.websocket("/ws/device/{room_id}")
 async def knx_device_websocket(websocket: WebSocket, room_id: str, auth=Depends(websocket_auth)):
     await websocket.accept()
     print(f"🔌 WebSocket connected for room {room_id} and Auth: {auth}")
     room = get_room_instance_by_id(room_id)
     if not room:
-        await websocket.send_json({"error": f"Room {room_id} not found"})
+        await send_json(websocket, {"error": f"Room {room_id} not found"})
         await websocket.close()
         return
 
     try:
         while True:
-            msg = await websocket.receive_json()
+            msg = await receive_json(websocket)
             if "subscribe" in msg:
                 for device_name in msg["subscribe"]:
                     device_ws_broadcaster.subscribe(room_id, device_name, websocket)
-                    await websocket.send_json({"subscribed_device": device_name})
+                    await send_json(websocket, {"subscribed_device": device_name})
             await asyncio.sleep(0.1)
     except WebSocketDisconnect:
         print(f"🔌 WebSocket disconnected for room {room_id}")
         device_ws_broadcaster.unsubscribe(websocket)
 
 
+@router.get("/ws/device/stats", summary="Device WebSocket fan-out counters")
+def device_websocket_stats():
+    return device_ws_broadcaster.stats()
+
+
 @router.websocket("/ws/group/{room_id}")
 async def knx_group_websocket(websocket: WebSocket, room_id: str):
     await websocket.accept()
     room = get_room_instance_by_id(room_id)
 
     if not room:
-        await websocket.send_json({"error": f"Room {room_id} not found"})
+        await send_json(websocket, {"error": f"Room {room_id} not found"})
         await websocket.close()
         return
 
-    subscribed_gas = set()
-    subscribed_devices = set()
-
-    async def telegram_listener(telegram: Telegram):
-        # Handle raw GA subscriptions
-        if isinstance(telegram.payload, GroupValueWrite):
-            dest = str(telegram.destination_address)
-            if dest in subscribed_gas:
-                value = telegram.payload.value.value
-                await websocket.send_json({"group_address": dest, "value": value})
+    # The room's dispatcher fills this queue from the telegram callback;
+    # sending happens here, off the xknx telegram queue. A slow client loses
+    # its oldest frames instead of growing the queue.
+    outbox = DropOldestQueue()
 
-        # Handle full device updates
-        for device in room.devices:
-            if device.name in subscribed_devices:
-                resolver = DEVICE_RESOLVERS.get(device.__class__.__name__)
-                if resolver:
-                    state = resolver(device)
-                    await websocket.send_json({"device": device.name, "state": state})
+    async def writer():
+        while True:
+            message = await outbox.get()
+            await send_json(websocket, message)
 
-    room.xknx.telegram_queue.register_telegram_received_cb(telegram_listener)
+    writer_task = asyncio.create_task(writer())
+    dispatcher = room.group_dispatcher
 
     try:
         while True:
-            msg = await websocket.receive_json()
+            try:
+                msg = await receive_json(websocket)
+            except ValueError:
+                outbox.put_nowait({"error": "Frames must be JSON objects"})
+                continue
+            if not isinstance(msg, dict):
+                outbox.put_nowait({"error": "Frames must be JSON objects"})
+                continue
 
             if "subscribe" in msg:
                 for addr in msg["subscribe"]:
-                    subscribed_gas.add(addr)
+                    dispatcher.subscribe_group_address(outbox, addr)
                     print(f"✅ Subscribed to GA {addr}")
 
             if "subscribe_devices" in msg:
                 for dev in msg["subscribe_devices"]:
-                    subscribed_devices.add(dev)
+                    dispatcher.subscribe_device(outbox, dev)
                     print(f"✅ Subscribed to device {dev}")
 
+            # {"replay": {"seconds": 30, "group_addresses": ["1/2/3"], "limit": 100}}
+            # backfills history, at most WS_REPLAY_MAX_TELEGRAMS of the newest telegrams
+            if "replay" in msg:
+                try:
+                    seconds, addresses, limit = parse_replay(msg["replay"])
+                except ValueError as e:
+                    outbox.put_nowait({"error": f"Invalid replay request: {e}"})
+                else:
+                    telegrams = []
+                    for addr in addresses:
+                        telegrams.extend(room.telegram_buffer.since(seconds, addr, limit))
+                    telegrams.sort(key=lambda t: t["timestamp"])
+                    outbox.put_nowait({"replay": telegrams[-limit:]})
+
             await asyncio.sleep(0.1)
 
     except WebSocketDisconnect:
         print(f"🔌 WebSocket disconnected for room {room_id}")
     finally:
-        room.xknx.telegram_queue.unregister_telegram_received_cb(telegram_listener)
+        dispatcher.unsubscribe(outbox)
+        writer_task.cancel()
@@ -1,54 +1,122 @@
 # app/routes/project_parser.py
-from fastapi import APIRouter, UploadFile, File, HTTPException, Path
-from xknxproject import XKNXProj
-from xknxproject.models import KNXProject
+from fastapi import APIRouter, UploadFile, File, HTTPException, Path, Query, Request
+from fastapi.responses import Response
+from app.core.project_store import (
+    knx_project_store,
+    UPLOAD_DIR,
+    PARSED_OUTPUT,
+    PARSED_SNAPSHOT,
+    PARSED_MANIFEST,
+)
+from app.core.project_import import project_import_manager
 import os
-import json
 from urllib.parse import unquote
 
 router = APIRouter()
 
-UPLOAD_DIR = "./app/uploads"
-PARSED_OUTPUT = os.path.join(UPLOAD_DIR, "parsed_knx_project.json")
-
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
+def _require_section(key: str) -> dict:
+    section = knx_project_store.section(key)
+    if section is None:
+        raise HTTPException(status_code=404, detail="No parsed project found")
+    return section
+
+
+def _without_keys(obj, keys: set[str]):
+    """Recursively copy a JSON-like structure, dropping the given dict keys at every level."""
+    if isinstance(obj, dict):
+        return {k: _without_keys(v, keys) for k, v in obj.items() if k not in keys}
+    if isinstance(obj, list):
+        return [_without_keys(item, keys) for item in obj]
+    return obj
+
+
+def _cached_json_response(request: Request, key: str, section: str, build) -> Response:
+    """
+    Serve a projection that is built and serialized once per project import.
+    Clients sending a matching If-None-Match get 304 Not Modified.
+    """
+    cached = knx_project_store.cached_body(key, section, build)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="No parsed project found")
+
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.post(
     "/import-knx-project",
     tags=["Project Import"],
     summary="Import and parse KNX project",
-    description="Uploads an ETS project file (.knxproj), parses it, and saves the parsed data as JSON."
+    description="Uploads an ETS project file (.knxproj) and starts parsing it in a background worker. "
+    "Returns an import job ID; poll /import-jobs/{job_id} for progress. "
+    "With incremental=true an unchanged archive is not parsed again and the job result "
+    "carries the added, removed and changed group addresses, devices and functions.",
+    status_code=202,
 )
-async def import_knx_project(file: UploadFile = File(...)):
+async def import_knx_project(
+    file: UploadFile = File(...),
+    incremental: bool = Query(
+        False, description="Diff against the previous import and skip parsing unchanged archives"
+    ),
+):
     try:
         if not file.filename.endswith(".knxproj"):
             raise HTTPException(status_code=400, detail="Invalid file type")
 
-        filepath = os.path.join(UPLOAD_DIR, file.filename)
-
-        with open(filepath, "wb") as f:
-            content = await file.read()
-            f.write(content)
-
-        try:
-            knxproj: XKNXProj = XKNXProj(path=filepath)
-            parsed: KNXProject = knxproj.parse()
-        except Exception as e:
-            raise HTTPException(
-                status_code=500, detail=f"Failed to parse KNX project: {e}"
-            )
-
-        with open(PARSED_OUTPUT, "w", encoding="utf-8") as f:
-            json.dump(parsed, f, indent=2, ensure_ascii=False)
-
-        return {"status": "✅ KNX project parsed successfully", "file": file.filename}
+        job = await project_import_manager.start(
+            file,
+            UPLOAD_DIR,
+            PARSED_OUTPUT,
+            PARSED_SNAPSHOT,
+            PARSED_MANIFEST,
+            incremental=incremental,
+        )
+        if job.status == "failed":
+            raise HTTPException(status_code=500, detail=job.error)
+
+        return {
+            "status": "⏳ KNX project import started",
+            "file": job.filename,
+            "job_id": job.job_id,
+            "status_url": f"/import-jobs/{job.job_id}",
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
         )
 
 
+@router.get(
+    "/import-jobs",
+    tags=["Project Import"],
+    summary="List KNX project import jobs",
+    description="Returns the most recent project import jobs, newest first."
+)
+async def list_import_jobs():
+    return project_import_manager.list_jobs()
+
+
+@router.get(
+    "/import-jobs/{job_id}",
+    tags=["Project Import"],
+    summary="Get KNX project import status",
+    description="Returns the status and progress of a project import job."
+)
+async def get_import_job(job_id: str):
+    job = project_import_manager.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job.to_dict()
+
+
 @router.get(
     "/knx-project",
     tags=["Project Import"],
@@ -57,18 +125,14 @@ async def import_knx_project(file: UploadFile = File(...)):
 )
 async def get_knx_project():
     try:
-        if not os.path.exists(PARSED_OUTPUT):
-            raise HTTPException(status_code=404, detail="No parsed project found")
-
-        with open(PARSED_OUTPUT, "r", encoding="utf-8") as f:
-            full_data = json.load(f)
-            summary = {
-                "info": full_data.get("info", {}),
-                "locations": full_data.get("locations", {}),
-                "group_addresses": full_data.get("group_addresses", {}),
-                "functions": full_data.get("functions", {}),
-            }
-            return summary
+        # Only the sections in the summary are loaded from the snapshot
+        summary = {
+            key: _require_section(key)
+            for key in ("info", "locations", "group_addresses", "functions")
+        }
+        return summary
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
@@ -83,13 +147,9 @@ async def get_knx_project():
 )
 def get_topology_hierarchy():
     try:
-        if not os.path.exists(PARSED_OUTPUT):
-            raise HTTPException(status_code=404, detail="No parsed project found")
-
-        with open(PARSED_OUTPUT, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            topology = data.get("topology", {})
-            return topology
+        return _require_section("topology")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
@@ -102,27 +162,16 @@ def get_topology_hierarchy():
     summary="Get lite list of devices",
     description="Returns a simplified list of devices without communication object IDs and channels."
 )
-def get_lite_list_of_devices():
+def get_lite_list_of_devices(request: Request):
     try:
-        if not os.path.exists(PARSED_OUTPUT):
-            raise HTTPException(status_code=404, detail="No parsed project found")
-
-        with open(PARSED_OUTPUT, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            devices = data.get("devices", {})
-
-            def strip_communication_object_ids(obj):
-                if isinstance(obj, dict):
-                    obj.pop("communication_object_ids", None)
-                    obj.pop("channels", None)
-                    for key in obj:
-                        strip_communication_object_ids(obj[key])
-                elif isinstance(obj, list):
-                    for item in obj:
-                        strip_communication_object_ids(item)
-
-            strip_communication_object_ids(devices)
-            return devices
+        return _cached_json_response(
+            request,
+            "devices-lite",
+            "devices",
+            lambda devices: _without_keys(devices, {"communication_object_ids", "channels"}),
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
@@ -137,13 +186,9 @@ def get_lite_list_of_devices():
 )
 def get_full_list_of_devices():
     try:
-        if not os.path.exists(PARSED_OUTPUT):
-            raise HTTPException(status_code=404, detail="No parsed project found")
-
-        with open(PARSED_OUTPUT, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            devices = data.get("devices", {})
-            return devices
+        return _require_section("devices")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
@@ -158,18 +203,15 @@ def get_full_list_of_devices():
 )
 async def get_device_by_individual_address(individual_address: str):
     try:
-        if not os.path.exists(PARSED_OUTPUT):
-            raise HTTPException(status_code=404, detail="No parsed project found")
-
-        with open(PARSED_OUTPUT, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            devices = data.get("devices", {})
-
-            device = devices.get(individual_address)
-            if device:
-                return device
-            else:
-                raise HTTPException(status_code=404, detail="Device not found")
+        _require_section("devices")
+
+        device = knx_project_store.get_device(individual_address)
+        if device:
+            return device
+        else:
+            raise HTTPException(status_code=404, detail="Device not found")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
@@ -182,41 +224,22 @@ async def get_device_by_individual_address(individual_address: str):
     summary="Get locations hierarchy",
     description="Returns the hierarchy of locations in the KNX project, excluding devices and functions."
 )
-def get_locations_hierarchy():
+def get_locations_hierarchy(request: Request):
     try:
-        if not os.path.exists(PARSED_OUTPUT):
-            raise HTTPException(status_code=404, detail="No parsed project found")
-
-        with open(PARSED_OUTPUT, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            locations = data.get("locations", {})
-
-            def strip_devices_and_functions(obj):
-                if isinstance(obj, dict):
-                    obj.pop("devices", None)
-                    obj.pop("functions", None)
-                    for key in obj:
-                        strip_devices_and_functions(obj[key])
-                elif isinstance(obj, list):
-                    for item in obj:
-                        strip_devices_and_functions(item)
-
-            strip_devices_and_functions(locations)
-            return locations
+        return _cached_json_response(
+            request,
+            "locations",
+            "locations",
+            lambda locations: _without_keys(locations, {"devices", "functions"}),
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
         )
 
 
-from fastapi import APIRouter, HTTPException
-import os
-import json
-
-router = APIRouter()
-
-PARSED_OUTPUT = "uploads/parsed_knx_project.json"
-
 @router.get(
     "/location/{name}",
     tags=["Project Structure"],
@@ -225,40 +248,21 @@ PARSED_OUTPUT = "uploads/parsed_knx_project.json"
 )
 async def get_location_by_name(name: str):
     try:
-        if not os.path.exists(PARSED_OUTPUT):
-            raise HTTPException(status_code=404, detail="No parsed project found")
-
-        with open(PARSED_OUTPUT, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            locations = data.get("locations", {})
-
-            def find_location_by_name(obj, name):
-                if isinstance(obj, dict):
-                    if obj.get("name") == name:
-                        return obj
-                    for key in obj:
-                        result = find_location_by_name(obj[key], name)
-                        if result:
-                            return result
-                elif isinstance(obj, list):
-                    for item in obj:
-                        result = find_location_by_name(item, name)
-                        if result:
-                            return result
-                return None
-
-            location = find_location_by_name(locations, name)
-            if location:
-                return location
-            else:
-                raise HTTPException(status_code=404, detail="Location not found")
+        _require_section("locations")
+
+        location = knx_project_store.get_location(name)
+        if location:
+            return location
+        else:
+            raise HTTPException(status_code=404, detail="Location not found")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
         )
 
 
-
 @router.get(
     "/functions",
     tags=["Functions"],
@@ -267,13 +271,9 @@ async def get_location_by_name(name: str):
 )
 async def get_functions():
     try:
-        if not os.path.exists(PARSED_OUTPUT):
-            raise HTTPException(status_code=404, detail="No parsed project found")
-
-        with open(PARSED_OUTPUT, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            functions = data.get("functions", {})
-            return functions
+        return _require_section("functions")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
@@ -288,18 +288,15 @@ async def get_functions():
 )
 async def get_function_by_identifier(identifier: str):
     try:
-        if not os.path.exists(PARSED_OUTPUT):
-            raise HTTPException(status_code=404, detail="No parsed project found")
-
-        with open(PARSED_OUTPUT, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            functions = data.get("functions", {})
-
-            function = functions.get(identifier)
-            if function:
-                return function
-            else:
-                raise HTTPException(status_code=404, detail="Function not found")
+        _require_section("functions")
+
+        function = knx_project_store.get_function(identifier)
+        if function:
+            return function
+        else:
+            raise HTTPException(status_code=404, detail="Function not found")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
@@ -314,13 +311,9 @@ async def get_function_by_identifier(identifier: str):
 )
 async def get_group_addresses():
     try:
-        if not os.path.exists(PARSED_OUTPUT):
-            raise HTTPException(status_code=404, detail="No parsed project found")
-
-        with open(PARSED_OUTPUT, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            group_addresses = data.get("group_addresses", {})
-            return group_addresses
+        return _require_section("group_addresses")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
@@ -335,23 +328,20 @@ async def get_group_addresses():
 )
 async def get_group_address_by_address(address: str = Path(...)):
     try:
-        if not os.path.exists(PARSED_OUTPUT):
-            raise HTTPException(status_code=404, detail="No parsed project found")
+        _require_section("group_addresses")
 
         decoded_address = unquote(address)
 
-        with open(PARSED_OUTPUT, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            group_addresses = data.get("group_addresses", {})
-
-            group_address = group_addresses.get(decoded_address)
-            if group_address:
-                return group_address
-            else:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Group address '{decoded_address}' not found",
-                )
+        group_address = knx_project_store.get_group_address(decoded_address)
+        if group_address:
+            return group_address
+        else:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Group address '{decoded_address}' not found",
+            )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
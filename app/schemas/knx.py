@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, List, Literal, Optional
 
 
 class KNXDeviceConfig(BaseModel):
@@ -16,8 +16,25 @@ class KNXDeviceConfig(BaseModel):
 class RoomConfig(BaseModel):
     room_id: str
     ip: str
+    connection_type: Optional[str] = None
     devices: List[KNXDeviceConfig]
 
 
 class KNXRuntimeConfig(BaseModel):
     rooms: List[RoomConfig] = Field(..., description="List of rooms with KNX devices")
+
+
+class GroupValueItem(BaseModel):
+    address: str
+    op: Literal["write", "read"] = "write"
+    value: Optional[Any] = None
+    dpt: Optional[str] = None
+    max_age: Optional[float] = None
+
+
+class GroupValueBatchRequest(BaseModel):
+    room_id: str
+    items: List[GroupValueItem] = Field(..., min_length=1)
+    interval_ms: Optional[float] = Field(
+        None, ge=0, description="Gap between telegrams; defaults to KNX_BATCH_INTERVAL_MS"
+    )
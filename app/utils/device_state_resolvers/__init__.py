@@ -1,17 +1,18 @@
-from .climate import resolve_climate_state
-from .binary_sensor import resolve_binary_sensor_state
-from .climate_mode import resolve_climate_mode_state
-from .cover import resolve_cover_state
-from .date_time import resolve_datetime_state
-from .expose_sensor import resolve_expose_sensor_state
-from .fan import resolve_fan_state
-from .light import resolve_light_state
-from .notification import resolve_notification_state
-from .numeric_value import resolve_numeric_value_state
-from .scene import resolve_scene_state
-from .sensor import resolve_sensor_state
-from .switch import resolve_switch_state
-from .weather import resolve_weather_state
+from .base import DeviceState
+from .climate import ClimateState, resolve_climate_state
+from .binary_sensor import BinarySensorState, resolve_binary_sensor_state
+from .climate_mode import ClimateModeState, resolve_climate_mode_state
+from .cover import CoverState, resolve_cover_state
+from .date_time import DateTimeState, resolve_datetime_state
+from .expose_sensor import ExposeSensorState, resolve_expose_sensor_state
+from .fan import FanState, resolve_fan_state
+from .light import LightState, resolve_light_state
+from .notification import NotificationState, resolve_notification_state
+from .numeric_value import NumericValueState, resolve_numeric_value_state
+from .scene import SceneState, resolve_scene_state
+from .sensor import SensorState, resolve_sensor_state
+from .switch import SwitchState, resolve_switch_state
+from .weather import WeatherState, resolve_weather_state
 
 DEVICE_RESOLVERS = {
     "Climate": resolve_climate_state,
@@ -28,4 +29,22 @@ DEVICE_RESOLVERS = {
     "Sensor": resolve_sensor_state,
     "Switch": resolve_switch_state,
     "Weather": resolve_weather_state,
-}
\ No newline at end of file
+}
+
+# Typed records behind the resolvers; a room keeps one per device and refreshes it on updates
+STATE_RECORDS: dict[str, type[DeviceState]] = {
+    "Climate": ClimateState,
+    "BinarySensor": BinarySensorState,
+    "ClimateMode": ClimateModeState,
+    "Cover": CoverState,
+    "DateTime": DateTimeState,
+    "ExposeSensor": ExposeSensorState,
+    "Fan": FanState,
+    "Light": LightState,
+    "Notification": NotificationState,
+    "NumericValue": NumericValueState,
+    "Scene": SceneState,
+    "Sensor": SensorState,
+    "Switch": SwitchState,
+    "Weather": WeatherState,
+}
@@ -0,0 +1,51 @@
+# app/utils/device_state_resolvers/base.py
+from abc import ABC, abstractmethod
+
+
+class DeviceState(ABC):
+    """
+    Resolved state of one device. `static` (name, type, addresses, supports_*
+    flags) is read once when the record is created; the dynamic values are
+    the subclass's slots, listed in FIELDS, and are re-read by refresh().
+    """
+
+    __slots__ = ("static", "stale", "_dict")
+    FIELDS: tuple[str, ...] = ()
+
+    def __init__(self, device):
+        self.static = self.capabilities(device)
+        self.stale = False
+        self._dict = None
+        for field, value in zip(self.FIELDS, self.read(device)):
+            setattr(self, field, value)
+
+    @staticmethod
+    @abstractmethod
+    def capabilities(device) -> dict:
+        """Static part of the state, read once."""
+
+    @abstractmethod
+    def read(self, device) -> tuple:
+        """Current dynamic values, in FIELDS order."""
+
+    def refresh(self, device) -> dict:
+        """Re-read the dynamic values; returns the ones that changed."""
+        changed = {}
+        for field, value in zip(self.FIELDS, self.read(device)):
+            if getattr(self, field) != value:
+                setattr(self, field, value)
+                changed[field] = value
+        if changed:
+            self._dict = None
+        self.stale = False
+        return changed
+
+    @property
+    def values(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def as_dict(self) -> dict:
+        """The full state, as the resolvers have always returned it. Cached until a value changes."""
+        if self._dict is None:
+            self._dict = {**self.static, **self.values}
+        return self._dict
@@ -2,14 +2,24 @@
 
 from xknx.devices import BinarySensor
 
+from .base import DeviceState
+
+
+class BinarySensorState(DeviceState):
+    __slots__ = FIELDS = ("state", "is_on", "is_off", "counter")
+
+    @staticmethod
+    def capabilities(device: BinarySensor) -> dict:
+        return {
+            "name": device.name,
+            "type": "binary_sensor",
+            "group_address": device.remote_value.group_address,
+            "room_id": getattr(device, "room_id", None)  # optional if dynamically attached
+        }
+
+    def read(self, device: BinarySensor) -> tuple:
+        return (device.state, device.is_on(), device.is_off(), device.counter)
+
+
 def resolve_binary_sensor_state(device: BinarySensor) -> dict:
-    return {
-        "name": device.name,
-        "type": "binary_sensor",
-        "state": device.state,
-        "is_on": device.is_on(),
-        "is_off": device.is_off(),
-        "counter": device.counter,
-        "group_address": device.remote_value.group_address,
-        "room_id": getattr(device, "room_id", None)  # optional if dynamically attached
-    }
\ No newline at end of file
+    return BinarySensorState(device).as_dict()
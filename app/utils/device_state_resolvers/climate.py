@@ -1,14 +1,31 @@
 # app/resolvers/climate.py
 from xknx.devices import Climate
 
+from .base import DeviceState
+
+
+class ClimateState(DeviceState):
+    __slots__ = FIELDS = (
+        "temperature", "target_temperature", "on", "active", "fan_speed", "swing",
+        "horizontal_swing", "setpoint_shift",
+    )
+
+    @staticmethod
+    def capabilities(device: Climate) -> dict:
+        return {}
+
+    def read(self, device: Climate) -> tuple:
+        return (
+            device.temperature.value if device.temperature else None,
+            device.target_temperature.value if device.target_temperature else None,
+            device.on.value if device.on else None,
+            device.active.value if device.active else None,
+            device.current_fan_speed,
+            device.current_swing,
+            device.current_horizontal_swing,
+            device.setpoint_shift,
+        )
+
+
 def resolve_climate_state(device: Climate) -> dict:
-    return {
-        "temperature": device.temperature.value if device.temperature else None,
-        "target_temperature": device.target_temperature.value if device.target_temperature else None,
-        "on": device.on.value if device.on else None,
-        "active": device.active.value if device.active else None,
-        "fan_speed": device.current_fan_speed,
-        "swing": device.current_swing,
-        "horizontal_swing": device.current_horizontal_swing,
-        "setpoint_shift": device.setpoint_shift,
-    }
\ No newline at end of file
+    return ClimateState(device).as_dict()
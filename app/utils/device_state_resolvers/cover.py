@@ -1,21 +1,39 @@
 from xknx.devices import Cover
 
+from .base import DeviceState
+
+
+class CoverState(DeviceState):
+    __slots__ = FIELDS = (
+        "position", "angle", "locked", "is_open", "is_closed", "is_opening",
+        "is_closing", "is_traveling", "position_reached",
+    )
+
+    @staticmethod
+    def capabilities(device: Cover) -> dict:
+        return {
+            "name": device.name,
+            "type": "Cover",
+            "room_id": getattr(device, "room_id", None),
+            "supports_stop": device.supports_stop,
+            "supports_locked": device.supports_locked,
+            "supports_position": device.supports_position,
+            "supports_angle": device.supports_angle,
+        }
+
+    def read(self, device: Cover) -> tuple:
+        return (
+            device.current_position(),
+            device.current_angle(),
+            device.is_locked(),
+            device.is_open(),
+            device.is_closed(),
+            device.is_opening(),
+            device.is_closing(),
+            device.is_traveling(),
+            device.position_reached(),
+        )
+
+
 def resolve_cover_state(device: Cover) -> dict:
-    return {
-        "name": device.name,
-        "type": "Cover",
-        "room_id": getattr(device, "room_id", None),
-        "position": device.current_position(),
-        "angle": device.current_angle(),
-        "locked": device.is_locked(),
-        "is_open": device.is_open(),
-        "is_closed": device.is_closed(),
-        "is_opening": device.is_opening(),
-        "is_closing": device.is_closing(),
-        "is_traveling": device.is_traveling(),
-        "position_reached": device.position_reached(),
-        "supports_stop": device.supports_stop,
-        "supports_locked": device.supports_locked,
-        "supports_position": device.supports_position,
-        "supports_angle": device.supports_angle,
-    }
+    return CoverState(device).as_dict()
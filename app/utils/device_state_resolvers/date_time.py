@@ -1,14 +1,27 @@
 from xknx.devices.datetime import DateTimeDevice, DateDevice, TimeDevice
 from typing import Union
 
+from .base import DeviceState
+
+
+class DateTimeState(DeviceState):
+    __slots__ = FIELDS = ("value",)
+
+    @staticmethod
+    def capabilities(device: Union[DateTimeDevice, DateDevice, TimeDevice]) -> dict:
+        return {
+            "name": device.name,
+            "type": device.__class__.__name__,
+            "room_id": getattr(device, "room_id", None),
+            "localtime": device.localtime,
+            "group_address": device.remote_value.group_address,
+            "group_address_state": device.remote_value.group_address_state,
+            "respond_to_read": device.respond_to_read,
+        }
+
+    def read(self, device: Union[DateTimeDevice, DateDevice, TimeDevice]) -> tuple:
+        return (str(device.value) if device.value else None,)
+
+
 def resolve_datetime_state(device: Union[DateTimeDevice, DateDevice, TimeDevice]) -> dict:
-    return {
-        "name": device.name,
-        "type": device.__class__.__name__,
-        "room_id": getattr(device, "room_id", None),
-        "value": str(device.value) if device.value else None,
-        "localtime": device.localtime,
-        "group_address": device.remote_value.group_address,
-        "group_address_state": device.remote_value.group_address_state,
-        "respond_to_read": device.respond_to_read,
-    }
+    return DateTimeState(device).as_dict()
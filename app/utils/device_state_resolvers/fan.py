@@ -1,14 +1,25 @@
 from xknx.devices import Fan
 
+from .base import DeviceState
+
+
+class FanState(DeviceState):
+    __slots__ = FIELDS = ("is_on", "current_speed", "current_oscillation")
+
+    @staticmethod
+    def capabilities(device: Fan) -> dict:
+        return {
+            "name": device.name,
+            "type": "Fan",
+            "room_id": getattr(device, "room_id", None),
+            "supports_oscillation": device.supports_oscillation,
+            "mode": device.mode.name if hasattr(device, "mode") else None,
+            "max_step": device.max_step,
+        }
+
+    def read(self, device: Fan) -> tuple:
+        return (device.is_on, device.current_speed, device.current_oscillation)
+
+
 def resolve_fan_state(device: Fan) -> dict:
-    return {
-        "name": device.name,
-        "type": "Fan",
-        "room_id": getattr(device, "room_id", None),
-        "is_on": device.is_on,
-        "current_speed": device.current_speed,
-        "supports_oscillation": device.supports_oscillation,
-        "current_oscillation": device.current_oscillation,
-        "mode": device.mode.name if hasattr(device, "mode") else None,
-        "max_step": device.max_step,
-    }
+    return FanState(device).as_dict()
@@ -1,9 +1,22 @@
 from xknx.devices import Notification
 
+from .base import DeviceState
+
+
+class NotificationState(DeviceState):
+    __slots__ = FIELDS = ("message",)
+
+    @staticmethod
+    def capabilities(device: Notification) -> dict:
+        return {
+            "name": device.name,
+            "type": "Notification",
+            "room_id": getattr(device, "room_id", None),
+        }
+
+    def read(self, device: Notification) -> tuple:
+        return (device.message,)
+
+
 def resolve_notification_state(device: Notification) -> dict:
-    return {
-        "name": device.name,
-        "type": "Notification",
-        "room_id": getattr(device, "room_id", None),
-        "message": device.message,
-    }
+    return NotificationState(device).as_dict()
@@ -1,12 +1,25 @@
 from xknx.devices import NumericValue
 
+from .base import DeviceState
+
+
+class NumericValueState(DeviceState):
+    __slots__ = FIELDS = ("value",)
+
+    @staticmethod
+    def capabilities(device: NumericValue) -> dict:
+        return {
+            "name": device.name,
+            "type": "NumericValue",
+            "room_id": getattr(device, "room_id", None),
+            "unit": device.unit_of_measurement(),
+            "device_class": device.ha_device_class(),
+            "group_address": device.sensor_value.group_address,
+        }
+
+    def read(self, device: NumericValue) -> tuple:
+        return (device.resolve_state(),)
+
+
 def resolve_numeric_value_state(device: NumericValue) -> dict:
-    return {
-        "name": device.name,
-        "type": "NumericValue",
-        "room_id": getattr(device, "room_id", None),
-        "value": device.resolve_state(),
-        "unit": device.unit_of_measurement(),
-        "device_class": device.ha_device_class(),
-        "group_address": device.sensor_value.group_address,
-    }
+    return NumericValueState(device).as_dict()
@@ -1,11 +1,24 @@
 from xknx.devices import RawValue
 
+from .base import DeviceState
+
+
+class RawValueState(DeviceState):
+    __slots__ = FIELDS = ("value",)
+
+    @staticmethod
+    def capabilities(device: RawValue) -> dict:
+        return {
+            "name": device.name,
+            "type": "RawValue",
+            "room_id": getattr(device, "room_id", None),
+            "group_address": device.remote_value.group_address,
+            "payload_length": device.remote_value.payload_length,
+        }
+
+    def read(self, device: RawValue) -> tuple:
+        return (device.resolve_state(),)
+
+
 def resolve_raw_value_state(device: RawValue) -> dict:
-    return {
-        "name": device.name,
-        "type": "RawValue",
-        "room_id": getattr(device, "room_id", None),
-        "value": device.resolve_state(),
-        "group_address": device.remote_value.group_address,
-        "payload_length": device.remote_value.payload_length,
-    }
+    return RawValueState(device).as_dict()
@@ -1,10 +1,25 @@
 from xknx.devices import Scene
 
+from .base import DeviceState
+
+
+class SceneState(DeviceState):
+    # A scene has nothing to report beyond its configuration
+    __slots__ = FIELDS = ()
+
+    @staticmethod
+    def capabilities(device: Scene) -> dict:
+        return {
+            "name": device.name,
+            "type": "Scene",
+            "room_id": getattr(device, "room_id", None),
+            "group_address": device.scene_value.group_address,
+            "scene_number": device.scene_number,
+        }
+
+    def read(self, device: Scene) -> tuple:
+        return ()
+
+
 def resolve_scene_state(device: Scene) -> dict:
-    return {
-        "name": device.name,
-        "type": "Scene",
-        "room_id": getattr(device, "room_id", None),
-        "group_address": device.scene_value.group_address,
-        "scene_number": device.scene_number,
-    }
+    return SceneState(device).as_dict()
@@ -1,12 +1,25 @@
 from xknx.devices import Sensor
 
+from .base import DeviceState
+
+
+class SensorState(DeviceState):
+    __slots__ = FIELDS = ("value",)
+
+    @staticmethod
+    def capabilities(device: Sensor) -> dict:
+        return {
+            "name": device.name,
+            "type": "Sensor",
+            "room_id": getattr(device, "room_id", None),
+            "group_address_state": device.sensor_value.group_address_state,
+            "unit": device.unit_of_measurement(),
+            "ha_class": device.ha_device_class(),
+        }
+
+    def read(self, device: Sensor) -> tuple:
+        return (device.sensor_value.value,)
+
+
 def resolve_sensor_state(device: Sensor) -> dict:
-    return {
-        "name": device.name,
-        "type": "Sensor",
-        "room_id": getattr(device, "room_id", None),
-        "group_address_state": device.sensor_value.group_address_state,
-        "value": device.sensor_value.value,
-        "unit": device.unit_of_measurement(),
-        "ha_class": device.ha_device_class(),
-    }
+    return SensorState(device).as_dict()
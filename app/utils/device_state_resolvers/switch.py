@@ -1,11 +1,24 @@
 from xknx.devices import Switch
 
+from .base import DeviceState
+
+
+class SwitchState(DeviceState):
+    __slots__ = FIELDS = ("state",)
+
+    @staticmethod
+    def capabilities(device: Switch) -> dict:
+        return {
+            "name": device.name,
+            "type": "Switch",
+            "room_id": getattr(device, "room_id", None),
+            "group_address": device.switch.group_address,
+            "group_address_state": device.switch.group_address_state,
+        }
+
+    def read(self, device: Switch) -> tuple:
+        return (device.state,)
+
+
 def resolve_switch_state(device: Switch) -> dict:
-    return {
-        "name": device.name,
-        "type": "Switch",
-        "room_id": getattr(device, "room_id", None),
-        "group_address": device.switch.group_address,
-        "group_address_state": device.switch.group_address_state,
-        "state": device.state,
-    }
+    return SwitchState(device).as_dict()
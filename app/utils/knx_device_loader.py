@@ -1,116 +1,226 @@
 # app/utils/knx_device_loader.py
 
-from xknx import XKNX
-from xknx.io import ConnectionConfig, ConnectionType
 from .knx_supported_devices import *
 from .knx_device_fields import *
-from xknx.telegram import Telegram
-from xknx.telegram.apci import GroupValueWrite, GroupValueResponse
-from xknx.telegram import TelegramDecodedData
-from xknx.core.group_address_dpt import GroupAddressDPT
-from app.utils.device_state_resolvers import DEVICE_RESOLVERS
+from app.utils.device_state_resolvers import STATE_RECORDS, DeviceState
 from app.core.ws_broadcaster import device_ws_broadcaster
-import asyncio
+from app.core.update_coalescer import device_update_coalescer
+from app.utils.knx_gateway_pool import GatewayPool, GatewayConnection, device_group_addresses
+from app.core.group_dispatcher import RoomGroupDispatcher
+from app.core.telegram_logging import log_knx_telegrams
+from app.core.telegram_buffer import TelegramRingBuffer
+from app.core.history_store import device_history_writer
+from app.core.ga_value_cache import GroupAddressValueCache
+from app.core.control_protocol import OutgoingTelegramWaiters
 
-ga_dpt_decoder = GroupAddressDPT()
+# Rooms behind the same gateway share one XKNX instance (or one routing connection)
+gateway_pool = GatewayPool(telegram_received_cbs=[log_knx_telegrams])
 
-def log_knx_telegrams(telegram: Telegram) -> None:
-    raw_payload = telegram.payload
-    src = telegram.source_address
-    dst = telegram.destination_address
-
-    decoded_value = None
-    try:
-        ga_dpt_decoder.set_decoded_data(telegram)
-        if isinstance(telegram.decoded_data, TelegramDecodedData):
-            decoded_value = telegram.decoded_data.value
-    except Exception as e:
-        decoded_value = f"Decode failed: {e}"
-
-    print(f"📨 Telegram | {src} → {dst} | Raw: {raw_payload} | Decoded: {decoded_value}")
 
 class RoomKNX:
-    def __init__(self, room_id, ip, devices):
+    def __init__(self, room_id, ip, devices, connection_type=None):
         self.room_id = room_id
         self.ip = ip
+        self.connection_type = connection_type
         self.devices_config = devices
+        self.connection: GatewayConnection | None = None
         self.xknx = None
         self.devices = []
+        self.devices_by_group_address = {}
+        self.devices_by_name = {}
+        self.state_records: dict[str, DeviceState] = {}
+        self.group_dispatcher = RoomGroupDispatcher(self)
+        # Kept across reconnects so history survives a tunnel drop
+        self.telegram_buffer = TelegramRingBuffer()
+        self.ga_values = GroupAddressValueCache()
+        self.outgoing_waiters = OutgoingTelegramWaiters()
+        # First Sensor of the room; what the temperature endpoints report
+        self.temperature_sensor = None
+        self._buffer_cb = None
 
     async def initialize(self):
-        config = ConnectionConfig(
-            connection_type=ConnectionType.TUNNELING,
-            gateway_ip=self.ip,
-            gateway_port=3671,
+        self.connection = await gateway_pool.acquire(
+            self.room_id, self.ip, self.connection_type
         )
-        self.xknx = XKNX(connection_config=config)
-        self.xknx.telegram_queue.register_telegram_received_cb(log_knx_telegrams)
-        await self.xknx.start()
+        self.xknx = self.connection.xknx
         await self.load_devices()
+        self._buffer_cb = self.xknx.telegram_queue.register_telegram_received_cb(
+            self._record_telegram, match_for_outgoing=True
+        )
+        self.group_dispatcher.attach()
+
+    def _record_telegram(self, telegram):
+        # Only what is addressed to this room's devices, whether or not the gateway is shared.
+        # Reads of other addresses (/ga-read) are cached by ga_values directly.
+        if telegram.destination_address not in self.devices_by_group_address:
+            return
+        self.telegram_buffer.record(telegram)
+        self.ga_values.record(telegram)
+        self.outgoing_waiters.notify(telegram)
 
     async def disconnect(self):
-        if self.xknx is not None:
-            await self.xknx.stop()
+        if self.connection is not None:
+            self.group_dispatcher.detach()
+            if self._buffer_cb is not None:
+                self.xknx.telegram_queue.unregister_telegram_received_cb(self._buffer_cb)
+                self._buffer_cb = None
+            connection = self.connection
+            self.connection = None
             self.xknx = None
             self.devices = []
+            self.devices_by_group_address = {}
+            self.devices_by_name = {}
+            self.temperature_sensor = None
+            # Values seen while disconnected are unknown; don't serve stale ones
+            self.ga_values.clear()
+            await gateway_pool.release(self.room_id, connection)
 
     async def connect(self):
-        if self.xknx is not None:
-            await self.xknx.start()
-            await self.load_devices()
+        if self.connection is None:
+            await self.initialize()
 
     def _device_callback(self, device):
-        device_type = device.__class__.__name__
-        resolver = DEVICE_RESOLVERS.get(device_type)
-        if resolver:
-            state = resolver(device)
-        else:
-            state = {"warning": f"No resolver for {device_type}"}
-
-        print(f"🔔 [{self.room_id}] {device.name} updated → {state}")
-        
-        # Send over websocket
-        asyncio.create_task(
-            device_ws_broadcaster.broadcast(self.room_id, device.name, state)
+        # Values are re-read only when someone asks for the state
+        record = self.state_records.get(device.name)
+        if record is not None:
+            record.stale = True
+        device_history_writer.record_device(self.room_id, device)
+
+        if not device_ws_broadcaster.has_subscribers(self.room_id, device.name):
+            return
+
+        # Bursts (dimmer ramps, chatty meters) collapse to one emit per window
+        device_update_coalescer.push(
+            (self.room_id, device.name), lambda: self._emit_device_state(device)
         )
 
+    def get_state_record(self, device) -> DeviceState | None:
+        """The device's state record, with its values re-read if it was updated since."""
+        record = self.state_records.get(device.name)
+        if record is not None and record.stale:
+            record.refresh(device)
+        return record
+
+    def get_device_state(self, device) -> dict:
+        """Resolved state of a device, cached until its next update."""
+        record = self.get_state_record(device)
+        if record is None:
+            return {"warning": f"No resolver for {device.__class__.__name__}"}
+        return record.as_dict()
+
+    def _emit_device_state(self, device):
+        record = self.get_state_record(device)
+        if record is None:
+            return
+
+        print(f"🔔 [{self.room_id}] {device.name} updated → {record.values}")
+
+        # Send over websocket (queued per client, never blocks the telegram path)
+        device_ws_broadcaster.publish(self.room_id, device.name, record)
+
+    def _build_device(self, dev_conf: dict):
+        device_type = dev_conf.get("type")
+        if not device_type or device_type not in SUPPORTED_DEVICES:
+            print(f"⚠️ Invalid or missing device type: {device_type}")
+            return None
+
+        device_class = SUPPORTED_DEVICES.get(device_type)
+        allowed_fields = DEVICE_ALLOWED_FIELDS.get(device_type, set())
+
+        dev_conf_clean = dev_conf.copy()
+
+        if device_type in ["Sensor", "NumericValue"]:
+            dev_conf_clean.setdefault("sync_state", True)
+
+        filtered_conf = {
+            k: v for k, v in dev_conf_clean.items() if k in allowed_fields
+        }
+        print(f"🧩 Final device conf for {device_type}: {filtered_conf}")
+
+        print(f"➡️ Adding {device_type} to {self.room_id}: {filtered_conf}")
+        device = device_class(
+            self.xknx,
+            device_updated_cb=self._device_callback,
+            **filtered_conf
+        )
+
+        if len(filtered_conf) == 0:
+            print(f"⚠️ No valid config fields found for {device_type} in {self.room_id}")
+        return device
+
+    def _reindex(self):
+        devices_by_group_address = {}
+        for device in self.devices:
+            for address in device_group_addresses(device):
+                devices_by_group_address.setdefault(address, []).append(device)
+        self.devices_by_group_address = devices_by_group_address
+        self.devices_by_name = {device.name: device for device in self.devices}
+        self.temperature_sensor = next(
+            (d for d in self.devices if d.__class__.__name__ == "Sensor"), None
+        )
+        # Static parts are read once here, for devices that don't have a record yet
+        for device in self.devices:
+            if device.name not in self.state_records:
+                record_class = STATE_RECORDS.get(device.__class__.__name__)
+                if record_class is not None:
+                    self.state_records[device.name] = record_class(device)
+                    device_ws_broadcaster.reset(self.room_id, device.name)
+
     async def load_devices(self):
+        self.connection.remove_devices(self.room_id)
         self.devices = []
+        self.state_records = {}
         for dev_conf in self.devices_config:
-            device_type = dev_conf.get("type")
-            if not device_type or device_type not in SUPPORTED_DEVICES:
-                print(f"⚠️ Invalid or missing device type: {device_type}")
-                continue
-
-            device_class = SUPPORTED_DEVICES.get(device_type)
-            allowed_fields = DEVICE_ALLOWED_FIELDS.get(device_type, set())
-
-            dev_conf_clean = dev_conf.copy()
-
-            if device_type in ["Sensor", "NumericValue"]:
-                dev_conf_clean.setdefault("sync_state", True)
-
-            filtered_conf = {
-                k: v for k, v in dev_conf_clean.items() if k in allowed_fields
-            }
-            print(f"🧩 Final device conf for {device_type}: {filtered_conf}")
-
-            print(f"➡️ Adding {device_type} to {self.room_id}: {filtered_conf}")
-            device = device_class(
-                self.xknx,
-                device_updated_cb=self._device_callback,
-                **filtered_conf
-            )
-            self.xknx.devices.async_add(device)
-            self.devices.append(device)
-
-            if len(filtered_conf) == 0:
-                print(f"⚠️ No valid config fields found for {device_type} in {self.room_id}")
+            device = self._build_device(dev_conf)
+            if device is not None:
+                self.devices.append(device)
 
+        self._reindex()
+        self.connection.add_devices(self.room_id, self.devices)
         print(f"✅ Room {self.room_id} initialized with {len(self.devices)} devices.")
 
+    def apply_device_changes(self, devices_config: list[dict], removed: set[str], added: set[str]):
+        """
+        Swap only the named devices on the running connection: `removed`
+        are detached, `added` are built from `devices_config`. Devices that
+        appear in both sets are replaced. Everything else keeps running.
+        All of `added` is built before anything is detached; if one of them
+        fails to build, ValueError is raised and the room is left as it was.
+        """
+        new = []
+        for dev_conf in devices_config:
+            name = dev_conf.get("name")
+            if name not in added:
+                continue
+            try:
+                device = self._build_device(dev_conf)
+            except Exception as e:
+                raise ValueError(f"Device {name!r} in {self.room_id}: {e}") from e
+            if device is None:
+                raise ValueError(f"Device {name!r} in {self.room_id}: invalid or missing type")
+            new.append(device)
+
+        self.devices_config = devices_config
+        old = [d for d in self.devices if d.name in removed]
+        self.connection.detach_devices(self.room_id, old)
+        for device in old:
+            self.state_records.pop(device.name, None)
+            device_ws_broadcaster.reset(self.room_id, device.name)
+
+        kept = [d for d in self.devices if d.name not in removed]
+        self.devices = kept + new
+        self._reindex()
+        self.connection.attach_devices(self.room_id, new)
+
+    async def retarget(self, ip: str, connection_type: str | None, devices_config: list[dict]):
+        """
+        Disconnect and point this room at another gateway; initialize()
+        connects it again. The instance, and whoever holds it, stays the same.
+        """
+        await self.disconnect()
+        self.ip = ip
+        self.connection_type = connection_type
+        self.devices_config = devices_config
+
     def get_device_by_name(self, name: str):
-        for d in self.devices:
-            if d.name == name:
-                return d
-        return None
\ No newline at end of file
+        return self.devices_by_name.get(name)
\ No newline at end of file
@@ -0,0 +1,214 @@
+# app/utils/knx_gateway_pool.py
+import asyncio
+import os
+from collections import defaultdict
+from typing import Callable
+
+from xknx import XKNX
+from xknx.devices import Device
+from xknx.io import ConnectionConfig, ConnectionType
+from xknx.telegram import Telegram
+
+from app.core.read_scheduler import GroupReadScheduler, ScheduledStateUpdater
+
+# "tunneling" (one tunnel per gateway IP) or "routing" (one multicast connection for everything)
+DEFAULT_CONNECTION_TYPE = os.getenv("KNX_CONNECTION_TYPE", "tunneling").lower()
+ROUTING_LOCAL_IP = os.getenv("KNX_ROUTING_LOCAL_IP") or None
+GATEWAY_PORT = 3671
+
+
+def device_group_addresses(device: Device) -> set:
+    """Every group address a device listens on (active, state and passive)."""
+    addresses = set()
+    for remote_value in device._iter_remote_values():
+        if remote_value.group_address is not None:
+            addresses.add(remote_value.group_address)
+        if remote_value.group_address_state is not None:
+            addresses.add(remote_value.group_address_state)
+        addresses.update(remote_value.passive_group_addresses)
+    return addresses
+
+
+class GatewayConnection:
+    """
+    One XKNX instance shared by every room behind the same gateway.
+    Room devices are not added to xknx.devices; incoming and outgoing
+    telegrams are dispatched through a group address index instead, so a
+    telegram only touches the devices that actually use its address.
+    """
+
+    def __init__(self, key: tuple[str, str | None], config: ConnectionConfig):
+        self.key = key
+        self.xknx = XKNX(connection_config=config)
+        # Every read on this gateway, including state updater polls, is rate limited here
+        self.read_scheduler = GroupReadScheduler(self.xknx)
+        self.xknx.state_updater = ScheduledStateUpdater(self.xknx, self.read_scheduler)
+        self.room_devices: dict[str, list[Device]] = {}
+        self.devices_by_group_address: dict = defaultdict(list)
+        self._dispatch_cb = None
+        # Paced batch writes take turns per gateway so they don't flood the line together
+        self.bus_lock = asyncio.Lock()
+        # While set, devices are attached without their state updater (and so
+        # without its initial read); the startup warm-up registers them paced
+        self.defer_state_updaters = False
+        self.deferred_state_updaters: list[Device] = []
+
+    @property
+    def rooms(self) -> set[str]:
+        return set(self.room_devices)
+
+    async def start(self, telegram_received_cbs: list[Callable[[Telegram], None]]):
+        for cb in telegram_received_cbs:
+            self.xknx.telegram_queue.register_telegram_received_cb(cb)
+        self._dispatch_cb = self.xknx.telegram_queue.register_telegram_received_cb(
+            self._dispatch, match_for_outgoing=True
+        )
+        await self.xknx.start()
+
+    async def stop(self):
+        for devices in self.room_devices.values():
+            for device in devices:
+                self._detach(device)
+        self.room_devices = {}
+        self.devices_by_group_address.clear()
+        self.read_scheduler.stop()
+        await self.xknx.stop()
+
+    def _dispatch(self, telegram: Telegram):
+        # Same contract as xknx.devices.process, but O(devices on this address)
+        for device in self.devices_by_group_address.get(telegram.destination_address, ()):
+            device.process(telegram)
+
+    def register_next_state_updater(self) -> Device | None:
+        """Start the state updater of the next deferred device (its first read goes out now)."""
+        if not self.deferred_state_updaters:
+            return None
+        device = self.deferred_state_updaters.pop(0)
+        device.register_state_updater()
+        return device
+
+    def _detach(self, device: Device):
+        device.async_remove_tasks()
+        device.unregister_state_updater()
+
+    def add_devices(self, room_id: str, devices: list[Device]):
+        self.remove_devices(room_id)
+        self.room_devices[room_id] = []
+        self.attach_devices(room_id, devices)
+
+    def remove_devices(self, room_id: str):
+        self.detach_devices(room_id, self.room_devices.pop(room_id, []))
+
+    def attach_devices(self, room_id: str, devices: list[Device]):
+        """Add devices to a room without touching the ones it already has."""
+        self.room_devices.setdefault(room_id, []).extend(devices)
+        for device in devices:
+            for address in device_group_addresses(device):
+                self.devices_by_group_address[address].append(device)
+            if self.defer_state_updaters:
+                self.deferred_state_updaters.append(device)
+            else:
+                device.register_state_updater()
+            if self.xknx.started.is_set():
+                device.async_start_tasks()
+
+    def detach_devices(self, room_id: str, devices: list[Device]):
+        gone = {id(d) for d in devices}
+        if room_id in self.room_devices:
+            self.room_devices[room_id] = [
+                d for d in self.room_devices[room_id] if id(d) not in gone
+            ]
+        if self.deferred_state_updaters:
+            self.deferred_state_updaters = [
+                d for d in self.deferred_state_updaters if id(d) not in gone
+            ]
+        for device in devices:
+            self._detach(device)
+            for address in device_group_addresses(device):
+                # xknx Device.__eq__ compares __dict__, so match on identity
+                listeners = [
+                    d for d in self.devices_by_group_address.get(address, ()) if d is not device
+                ]
+                if listeners:
+                    self.devices_by_group_address[address] = listeners
+                else:
+                    self.devices_by_group_address.pop(address, None)
+
+
+class GatewayPool:
+    """Hands out shared GatewayConnections keyed by gateway IP (or a single routing connection)."""
+
+    def __init__(self, telegram_received_cbs: list[Callable[[Telegram], None]] | None = None):
+        self.connections: dict[tuple[str, str | None], GatewayConnection] = {}
+        self._locks: dict[tuple[str, str | None], asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._telegram_received_cbs = telegram_received_cbs or []
+        # Copied onto connections created while set (see GatewayConnection.defer_state_updaters)
+        self.defer_state_updaters = False
+
+    @staticmethod
+    def _key(ip: str, connection_type: str | None) -> tuple[str, str | None]:
+        mode = (connection_type or DEFAULT_CONNECTION_TYPE).lower()
+        if mode == "routing":
+            return ("routing", None)
+        return ("tunneling", ip)
+
+    @staticmethod
+    def _config(key: tuple[str, str | None]) -> ConnectionConfig:
+        mode, ip = key
+        if mode == "routing":
+            return ConnectionConfig(
+                connection_type=ConnectionType.ROUTING,
+                local_ip=ROUTING_LOCAL_IP,
+            )
+        return ConnectionConfig(
+            connection_type=ConnectionType.TUNNELING,
+            gateway_ip=ip,
+            gateway_port=GATEWAY_PORT,
+        )
+
+    async def acquire(
+        self, room_id: str, ip: str, connection_type: str | None = None
+    ) -> GatewayConnection:
+        key = self._key(ip, connection_type)
+        async with self._locks[key]:
+            connection = self.connections.get(key)
+            if connection is None:
+                connection = GatewayConnection(key, self._config(key))
+                connection.defer_state_updaters = self.defer_state_updaters
+                try:
+                    await connection.start(self._telegram_received_cbs)
+                except BaseException:
+                    # Includes cancellation by a connect timeout; don't leak a half-open tunnel
+                    try:
+                        await connection.xknx.stop()
+                    except Exception:
+                        pass
+                    raise
+                self.connections[key] = connection
+                print(f"🔗 Opened KNX {key[0]} connection {key[1] or ''}".rstrip())
+            connection.room_devices.setdefault(room_id, [])
+            return connection
+
+    async def release(self, room_id: str, connection: GatewayConnection):
+        async with self._locks[connection.key]:
+            connection.remove_devices(room_id)
+            if connection.room_devices:
+                return
+            if self.connections.get(connection.key) is connection:
+                del self.connections[connection.key]
+            await connection.stop()
+            print(f"🔌 Closed KNX {connection.key[0]} connection {connection.key[1] or ''}".rstrip())
+
+    def stats(self) -> list[dict]:
+        return [
+            {
+                "mode": key[0],
+                "gateway_ip": key[1],
+                "rooms": sorted(connection.rooms),
+                "devices": sum(len(d) for d in connection.room_devices.values()),
+                "group_addresses": len(connection.devices_by_group_address),
+                "deferred_state_updaters": len(connection.deferred_state_updaters),
+                "reads": connection.read_scheduler.stats(),
+            }
+            for key, connection in self.connections.items()
+        ]
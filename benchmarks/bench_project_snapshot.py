@@ -0,0 +1,121 @@
+# benchmarks/bench_project_snapshot.py
+"""
+Compare the JSON project file against the binary snapshot on a synthetic
+project with 50k group addresses.
+
+    python -m benchmarks.bench_project_snapshot
+"""
+import json
+import os
+import random
+import tempfile
+import time
+
+from app.core.project_snapshot import write_snapshot
+from app.core.project_store import KNXProjectStore
+
+GROUP_ADDRESSES = 50_000
+DEVICES = 5_000
+REPEATS = 5
+
+
+def make_project(n_ga: int = GROUP_ADDRESSES, n_devices: int = DEVICES) -> dict:
+    group_addresses = {}
+    for i in range(n_ga):
+        address = f"{(i >> 11) & 31}/{(i >> 8) & 7}/{i & 255}"
+        group_addresses[address] = {
+            "name": f"Group address {i}",
+            "identifier": f"GA-{i}",
+            "raw_address": i,
+            "address": address,
+            "project_uid": i,
+            "dpt": {"main": 9, "sub": 1},
+            "data_secure": False,
+            "communication_object_ids": [f"CO-{i}-{j}" for j in range(3)],
+            "description": "Synthetic group address for benchmarking",
+            "comment": "",
+        }
+
+    devices = {}
+    for i in range(n_devices):
+        ia = f"{i // 4096}.{(i // 256) % 16}.{i % 256}"
+        devices[ia] = {
+            "name": f"Device {i}",
+            "hardware_name": "Switch actuator",
+            "order_number": f"ORD-{i}",
+            "manufacturer_name": "Synthetic",
+            "individual_address": ia,
+            "project_uid": i,
+            "communication_object_ids": [f"CO-{i}-{j}" for j in range(10)],
+            "channels": {f"CH-{j}": {"identifier": f"CH-{j}", "name": f"Channel {j}"} for j in range(4)},
+        }
+
+    return {
+        "info": {"name": "Synthetic benchmark project"},
+        "communication_objects": {},
+        "topology": {},
+        "devices": devices,
+        "group_addresses": group_addresses,
+        "group_ranges": {},
+        "locations": {},
+        "functions": {},
+    }
+
+
+def best_of(fn, repeats: int = REPEATS) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    project = make_project()
+    ga_keys = list(project["group_addresses"])
+    device_keys = list(project["devices"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "parsed_knx_project.json")
+        snap_path = os.path.join(tmp, "parsed_knx_project.snap")
+
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(project, f, indent=2, ensure_ascii=False)
+        write_snapshot(project, snap_path)
+        # Make sure the snapshot counts as current for the store
+        now = time.time()
+        os.utime(json_path, (now - 1, now - 1))
+
+        def json_lookup():
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            data["group_addresses"][random.choice(ga_keys)]
+            data["devices"][random.choice(device_keys)]
+
+        def snapshot_lookup():
+            store = KNXProjectStore(json_path, snap_path)
+            store.get_group_address(random.choice(ga_keys))
+            store.get_device(random.choice(device_keys))
+
+        def snapshot_section():
+            store = KNXProjectStore(json_path, snap_path)
+            store.section("group_addresses")
+
+        warm = KNXProjectStore(json_path, snap_path)
+        warm.get_group_address(ga_keys[0])
+
+        def snapshot_warm_lookup():
+            warm.get_group_address(random.choice(ga_keys))
+
+        print(f"Synthetic project: {len(ga_keys)} group addresses, {len(device_keys)} devices")
+        print(f"JSON file size:       {os.path.getsize(json_path) / 1e6:8.2f} MB")
+        print(f"Snapshot file size:   {os.path.getsize(snap_path) / 1e6:8.2f} MB")
+        print(f"JSON cold lookup:     {best_of(json_lookup):8.2f} ms  (json.load + 2 lookups)")
+        print(f"Snapshot cold lookup: {best_of(snapshot_lookup):8.2f} ms  (open + 2 lookups)")
+        print(f"Snapshot GA section:  {best_of(snapshot_section):8.2f} ms  (open + full group_addresses)")
+        print(f"Snapshot warm lookup: {best_of(snapshot_warm_lookup, 1000) * 1000:8.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# benchmarks/bench_serialization.py
+"""
+Encode the resolved state of every device type the app resolves: the old
+path (recursive serialize_state walk + stdlib json, as WebSocket send_json
+did) against the orjson layer in app.core.serialization. "refresh" is
+what a room pays per update with a state record: dynamic values only.
+
+    python -m benchmarks.bench_serialization
+"""
+import json
+import time
+
+from xknx import XKNX
+from xknx.devices import (
+    BinarySensor,
+    Climate,
+    ClimateMode,
+    Cover,
+    ExposeSensor,
+    Fan,
+    Light,
+    Notification,
+    NumericValue,
+    Scene,
+    Sensor,
+    Switch,
+    Weather,
+)
+from xknx.devices.datetime import DateTimeDevice
+from xknx.dpt import RGBColor
+from xknx.dpt.dpt_20 import HVACControllerMode, HVACOperationMode
+from xknx.telegram.address import GroupAddress
+
+from app.core.serialization import dumps_text
+from app.utils.device_state_resolvers import DEVICE_RESOLVERS, STATE_RECORDS
+
+REPEATS = 20_000
+
+
+def make_devices(xknx: XKNX) -> dict:
+    """One device per resolver, with every state it reports filled in."""
+    light = Light(
+        xknx, "Light", group_address_switch="1/0/1", group_address_brightness="1/0/2",
+        group_address_color="1/0/3", group_address_tunable_white="1/0/4",
+        group_address_color_temperature="1/0/5",
+    )
+    light.switch.value = True
+    light.brightness.value = 180
+    light.color.value = RGBColor(255, 120, 0)
+    light.tunable_white.value = 50
+    light.color_temperature.value = 3000
+
+    climate = Climate(
+        xknx, "Climate", group_address_temperature="2/0/1",
+        group_address_target_temperature="2/0/2", group_address_on_off="2/0/3",
+        group_address_fan_speed="2/0/4", group_address_setpoint_shift="2/0/5",
+    )
+    climate.temperature.value = 21.4
+    climate.target_temperature.value = 22.0
+    climate.on.value = True
+    climate.fan_speed.value = 40
+
+    climate_mode = ClimateMode(
+        xknx, "ClimateMode", group_address_operation_mode="2/1/1",
+        group_address_controller_mode="2/1/2",
+    )
+    climate_mode.remote_value_operation_mode.value = HVACOperationMode.COMFORT
+    climate_mode.remote_value_controller_mode.value = HVACControllerMode.HEAT
+
+    cover = Cover(
+        xknx, "Cover", group_address_long="3/0/1", group_address_position="3/0/2",
+        group_address_position_state="3/0/3", group_address_angle="3/0/4",
+    )
+    cover.position_current.value = 60
+    cover.angle.value = 30
+
+    weather = Weather(
+        xknx, "Weather", group_address_temperature="4/0/1", group_address_humidity="4/0/2",
+        group_address_wind_speed="4/0/3", group_address_brightness_south="4/0/4",
+        group_address_rain_alarm="4/0/5",
+    )
+    weather._temperature.value = 14.2
+    weather._humidity.value = 63.0
+    weather._wind_speed.value = 3.4
+    weather._brightness_south.value = 12000.0
+    weather._rain_alarm.value = False
+
+    binary_sensor = BinarySensor(xknx, "BinarySensor", group_address_state="5/0/10")
+    binary_sensor.remote_value.value = True
+    date_time = DateTimeDevice(xknx, "DateTime", group_address="5/0/11", localtime=False)
+    expose = ExposeSensor(xknx, "ExposeSensor", group_address="5/0/12", value_type="temperature")
+    expose.sensor_value.value = 19.5
+    fan = Fan(xknx, "Fan", group_address_speed="5/0/13", group_address_oscillation="5/0/14")
+    fan.speed.value = 75
+    fan.oscillation.value = True
+    notification = Notification(xknx, "Notification", group_address="5/0/15")
+    notification.remote_value.value = "Window open"
+    numeric = NumericValue(xknx, "NumericValue", group_address="5/0/16", value_type="power")
+    numeric.sensor_value.value = 1530.0
+    scene = Scene(xknx, "Scene", group_address="5/0/17", scene_number=3)
+    sensor = Sensor(xknx, "Sensor", group_address_state="5/0/18", value_type="temperature")
+    sensor.sensor_value.value = 22.3
+    switch = Switch(xknx, "Switch", group_address="5/0/19")
+    switch.switch.value = True
+
+    return {
+        "Light": light,
+        "Climate": climate,
+        "ClimateMode": climate_mode,
+        "Cover": cover,
+        "Weather": weather,
+        "BinarySensor": binary_sensor,
+        "DateTime": date_time,
+        "ExposeSensor": expose,
+        "Fan": fan,
+        "Notification": notification,
+        "NumericValue": numeric,
+        "Scene": scene,
+        "Sensor": sensor,
+        "Switch": switch,
+    }
+
+
+def stdlib_encode(state: dict) -> str:
+    """What a WebSocket frame used to cost: walk the dict, then json.dumps."""
+
+    def walk(val):
+        if isinstance(val, GroupAddress):
+            return str(val)
+        if isinstance(val, dict):
+            return {k: walk(v) for k, v in val.items()}
+        if isinstance(val, list):
+            return [walk(v) for v in val]
+        return val
+
+    return json.dumps(walk(state), default=str)
+
+
+def per_call_us(fn, repeats: int = REPEATS) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    xknx = XKNX()
+    devices = make_devices(xknx)
+    missing = set(DEVICE_RESOLVERS) - set(devices)
+    if missing:
+        print(f"Not covered: {sorted(missing)}")
+
+    print(
+        f"{'device':<14}{'bytes':>7}{'resolve µs':>12}{'refresh µs':>12}"
+        f"{'stdlib µs':>11}{'orjson µs':>11}{'speedup':>9}"
+    )
+    totals = [0.0, 0.0, 0.0, 0.0]
+    for device_type, device in devices.items():
+        resolver = DEVICE_RESOLVERS[device_type]
+        record = STATE_RECORDS[device_type](device)
+        state = resolver(device)
+        resolve = per_call_us(lambda: resolver(device))
+        refresh = per_call_us(lambda: record.refresh(device))
+        stdlib = per_call_us(lambda: stdlib_encode(state))
+        fast = per_call_us(lambda: dumps_text(state))
+        for i, timing in enumerate((resolve, refresh, stdlib, fast)):
+            totals[i] += timing
+        print(
+            f"{device_type:<14}{len(dumps_text(state)):>7}{resolve:>12.2f}{refresh:>12.2f}"
+            f"{stdlib:>11.2f}{fast:>11.2f}{stdlib / fast:>8.1f}x"
+        )
+    print(
+        f"{'all types':<14}{'':>7}{totals[0]:>12.2f}{totals[1]:>12.2f}"
+        f"{totals[2]:>11.2f}{totals[3]:>11.2f}{totals[2] / totals[3]:>8.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,31 @@
 # knx_control.py
 import asyncio
 import logging
+import os
 import time
 from app.utils.knx_device_loader import RoomKNX
+from app.core.room_registry import room_registry
+from app.core.config_reconcile import plan_reconciliation
+from app.core.read_scheduler import READ_PRIORITY_USER
 
 # Dynamic config store
 dynamic_room_config = []  # Will be filled from frontend/API
-room_instances: list[RoomKNX] = []
-ROOM_INSTANCES: dict[str, RoomKNX] = {}
+# One config change at a time: the startup restore, /knx-config-runtime and the single-room adds
+_config_lock = asyncio.Lock()
+
+# How many tunnels are negotiated at once, and how long one attempt may take
+ROOM_CONNECT_CONCURRENCY = int(os.getenv("KNX_ROOM_CONNECT_CONCURRENCY", "4"))
+ROOM_CONNECT_TIMEOUT = float(os.getenv("KNX_ROOM_CONNECT_TIMEOUT", "10"))
+ROOM_CONNECT_RETRIES = int(os.getenv("KNX_ROOM_CONNECT_RETRIES", "2"))
 
 logging.basicConfig(level=logging.INFO)
-logging.getLogger("xknx.log").level = logging.DEBUG
-logging.getLogger("xknx.knx").level = logging.DEBUG
+# xknx's own frame/telegram loggers are very chatty at DEBUG; opt in via env
+logging.getLogger("xknx.log").setLevel(os.getenv("XKNX_LOG_LEVEL", "INFO").upper())
+logging.getLogger("xknx.knx").setLevel(os.getenv("XKNX_LOG_LEVEL", "INFO").upper())
 
 
 def get_room_instance_by_id(room_id: str) -> RoomKNX | None:
-    return ROOM_INSTANCES.get(room_id)
+    return room_registry.get(room_id)
 
 # ✅ Get a specific room config by ID (from stored config)
 def get_room_config_by_id(room_id: str):
@@ -27,97 +37,195 @@ async def add_room_instance_by_id(room_id: str):
     if not config:
         raise ValueError(f"No stored config found for room {room_id}")
 
-    await remove_room_instance(room_id)
+    async with _config_lock:
+        await remove_room_instance(room_id)
 
-    instance = RoomKNX(
-        room_id=config["room_id"],
-        ip=config["ip"],
-        devices=config["devices"],
-    )
-    await instance.initialize()
-    room_instances.append(instance)
-    ROOM_INSTANCES[room_id] = instance
+        instance = RoomKNX(
+            room_id=config["room_id"],
+            ip=config["ip"],
+            devices=config["devices"],
+            connection_type=config.get("connection_type"),
+        )
+        await instance.initialize()
+        room_registry.add(instance)
 
 # ✅ Remove an instance by ID
 async def remove_room_instance(room_id: str):
-    global room_instances
-    instance = next((r for r in room_instances if r.room_id == room_id), None)
+    instance = room_registry.remove(room_id)
     if instance:
-        await instance.disconnect()  # optional: add graceful disconnect in RoomKNX
-        room_instances = [r for r in room_instances if r.room_id != room_id]
+        await instance.disconnect()
+
+
+async def _disconnect_quietly(inst: RoomKNX):
+    try:
+        await inst.disconnect()
+    except Exception as e:
+        logging.warning(f"Error disconnecting room {inst.room_id}: {e}")
+
+
+async def _connect_room(
+    cfg: dict,
+    semaphore: asyncio.Semaphore,
+    timeout: float,
+    retries: int,
+) -> tuple[RoomKNX, bool, float]:
+    inst = RoomKNX(
+        room_id=cfg["room_id"],
+        ip=cfg["ip"],
+        devices=cfg["devices"],
+        connection_type=cfg.get("connection_type"),
+    )
+    start = time.perf_counter()
+    ok = await _initialize_with_retry(inst, retries=retries, timeout=timeout, semaphore=semaphore)
+    latency_ms = round((time.perf_counter() - start) * 1000, 1)
+    return inst, ok, latency_ms
 
-# This is the main setup function triggered on FastAPI startup or config update
-async def setup_knx_all():
-    global room_instances, ROOM_INSTANCES
 
-    # 1) Tear down any existing tunnels so we free up gateway channels
-    for inst in room_instances:
-        try:
-            await inst.disconnect()
-        except Exception as e:
-            logging.warning(f"Error disconnecting room {inst.room_id}: {e}")
-
-    # 2) Reset in-memory collections
-    room_instances = []
-    ROOM_INSTANCES = {}
+# This is the main setup function triggered on FastAPI startup or config update
+async def setup_knx_all(
+    concurrency: int = ROOM_CONNECT_CONCURRENCY,
+    timeout: float = ROOM_CONNECT_TIMEOUT,
+    retries: int = ROOM_CONNECT_RETRIES,
+):
+    # 1+2) Unregister everything and tear down the tunnels so we free up gateway channels
+    await asyncio.gather(*(_disconnect_quietly(inst) for inst in room_registry.clear()))
+
+    # 3) Re-build concurrently; a dead gateway only holds up its own slot
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results = await asyncio.gather(
+        *(_connect_room(cfg, semaphore, timeout, retries) for cfg in dynamic_room_config)
+    )
 
-    # 3) Re-build with per-room error capture
     failed = []
-    for cfg in dynamic_room_config:
-        inst = RoomKNX(
-            room_id=cfg["room_id"],
-            ip=cfg["ip"],
-            devices=cfg["devices"],
-        )
-        try:
-            await inst.initialize()
-            room_instances.append(inst)
-            ROOM_INSTANCES[cfg["room_id"]] = inst
-        except Exception as e:
-            logging.error(f"❌ Could not connect room {cfg['room_id']}: {e}")
-            failed.append(cfg["room_id"])
+    latency = {}
+    for inst, ok, latency_ms in results:
+        latency[inst.room_id] = latency_ms
+        if ok:
+            room_registry.add(inst)
+        else:
+            failed.append(inst.room_id)
 
     # 4) Return a summary instead of blowing up
     return {
         "status": "partial" if failed else "complete",
-        "configured": len(room_instances),
+        "configured": len(room_registry),
         "failed_rooms": failed,
+        "connect_latency_ms": latency,
     }
 
 
+async def reconcile_rooms(
+    concurrency: int = ROOM_CONNECT_CONCURRENCY,
+    timeout: float = ROOM_CONNECT_TIMEOUT,
+    retries: int = ROOM_CONNECT_RETRIES,
+):
+    """
+    Bring the running rooms in line with dynamic_room_config, touching only
+    what changed: removed rooms are disconnected, new rooms connected, rooms
+    with a new gateway reconnected in place, and on every other room only
+    the added, removed or edited devices are swapped. RoomKNX instances are
+    kept wherever possible, so their subscribers never notice.
+    """
+    wanted = {str(cfg["room_id"]): cfg for cfg in dynamic_room_config}
+    plan = plan_reconciliation(room_registry.rooms(), dynamic_room_config)
+
+    for room_id in plan["remove"]:
+        await remove_room_instance(room_id)
+
+    device_errors = {}
+    for room_id, changes in plan["devices"].items():
+        room = room_registry.get(room_id)
+        try:
+            room.apply_device_changes(
+                wanted[room_id]["devices"],
+                removed=set(changes["removed"]) | set(changes["updated"]),
+                added=set(changes["added"]) | set(changes["updated"]),
+            )
+        except Exception as e:
+            # Raised before anything was detached: the room keeps running with its previous devices
+            device_errors[room_id] = str(e)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def reconnect(room_id: str) -> tuple[RoomKNX, bool, float]:
+        room = room_registry.get(room_id)
+        cfg = wanted[room_id]
+        start = time.perf_counter()
+        await room.retarget(cfg["ip"], cfg.get("connection_type"), cfg["devices"])
+        ok = await _initialize_with_retry(room, retries=retries, timeout=timeout, semaphore=semaphore)
+        latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        return room, ok, latency_ms
+
+    results = await asyncio.gather(
+        *(_connect_room(wanted[room_id], semaphore, timeout, retries) for room_id in plan["add"]),
+        *(reconnect(room_id) for room_id in plan["reconnect"]),
+    )
+
+    failed = []
+    latency = {}
+    for inst, ok, latency_ms in results:
+        room_id = str(inst.room_id)
+        latency[room_id] = latency_ms
+        if ok:
+            room_registry.add(inst)
+        else:
+            room_registry.remove(room_id)
+            failed.append(room_id)
+
+    return {
+        "status": "partial" if failed or device_errors else "complete",
+        "configured": len(room_registry),
+        "failed_rooms": failed,
+        "device_errors": device_errors,
+        "added_rooms": [r for r in plan["add"] if r not in failed],
+        "removed_rooms": plan["remove"],
+        "reconnected_rooms": [r for r in plan["reconnect"] if r not in failed],
+        "device_changes": {
+            room_id: changes for room_id, changes in plan["devices"].items() if room_id not in device_errors
+        },
+        "unchanged_rooms": len(plan["unchanged"]),
+        "connect_latency_ms": latency,
+    }
 
 
 # Update configuration dynamically from API
-async def update_room_configuration(config: list[dict]):
+async def update_room_configuration(config: list[dict], full_rebuild: bool = False):
     """
-    Overwrite the in-memory config and rebuild all tunnels,
-    returning a summary of successes vs. failures.
+    Overwrite the in-memory config and apply it, returning a summary of
+    what changed and which rooms failed. By default only the differences
+    are applied; full_rebuild tears down and rebuilds every tunnel.
+    A call made while another is applying waits for it to finish.
     """
     global dynamic_room_config
-    dynamic_room_config = config
-    # setup_knx_all now returns {"status":"complete"/"partial", "configured": N, "failed_rooms":[...]}
-    return await setup_knx_all()
+    async with _config_lock:
+        dynamic_room_config = config
+        if full_rebuild:
+            return await setup_knx_all()
+        return await reconcile_rooms()
 
 
 # Utility to get data from a device (for now used by /temperature)
 async def get_temperature_for_room(room_id: str):
-    room = next((r for r in room_instances if r.room_id == room_id), None)
+    room = room_registry.get(room_id)
     if not room:
         return {"error": f"Room {room_id} is not configured"}
-
-    for device in room.devices:
-        if device.__class__.__name__ == "Sensor":
-            print(f"📡 Syncing sensor '{device.name}' in Room {room_id}...")
-            await device.sync(wait_for_result=True)
-            temp = device.resolve_state()
-            print(f"🌡️ Room {room_id} → {device.name}: {temp}")
-            return {
-                "room_id": room_id,
-                "sensor": device.name,
-                "temperature": temp if temp is not None else "no data",
-            }
-
-    return {"error": f"No sensor found in Room {room_id}"}
+    if room.xknx is None:
+        # Registered but between connections (e.g. being retargeted)
+        return {"error": f"Room {room_id} is not connected"}
+
+    device = room.temperature_sensor
+    if device is None:
+        return {"error": f"No sensor found in Room {room_id}"}
+
+    print(f"📡 Syncing sensor '{device.name}' in Room {room_id}...")
+    await room.connection.read_scheduler.sync_device(device, READ_PRIORITY_USER)
+    temp = device.resolve_state()
+    print(f"🌡️ Room {room_id} → {device.name}: {temp}")
+    return {
+        "room_id": room_id,
+        "sensor": device.name,
+        "temperature": temp if temp is not None else "no data",
+    }
 
 
 def get_current_configuration():
@@ -126,68 +234,78 @@ def get_current_configuration():
             {
                 "room_id": room.room_id,
                 "ip": room.ip,
+                "connection_type": room.connection_type,
                 "devices": room.devices_config,
             }
-            for room in room_instances
+            for room in room_registry.rooms().values()
         ]
     }
 
 
 def get_all_rooms():
-    return {room.room_id: room for room in room_instances}
+    return room_registry.rooms()
 
 
 async def add_room_instance(room):
-    global room_instances, dynamic_room_config
-
-    # Remove old room config if exists
-    room_instances = [r for r in room_instances if str(r.room_id) != str(room.room_id)]
-    dynamic_room_config = [r for r in dynamic_room_config if str(r["room_id"]) != str(room.room_id)]
-
-
-    # Add new config
-    instance = RoomKNX(
-        room_id=room.room_id,
-        ip=room.ip,
-        devices=[device.dict() for device in room.devices],
-    )
-    await instance.initialize()
-    room_instances.append(instance)
+    global dynamic_room_config
+    async with _config_lock:
+        # Replace (and disconnect) the old instance and config if they exist
+        await remove_room_instance(room.room_id)
+        dynamic_room_config = [r for r in dynamic_room_config if str(r["room_id"]) != str(room.room_id)]
+
+
+        # Add new config
+        instance = RoomKNX(
+            room_id=room.room_id,
+            ip=room.ip,
+            devices=[device.dict() for device in room.devices],
+            connection_type=getattr(room, "connection_type", None),
+        )
+        await instance.initialize()
+        room_registry.add(instance)
 
-    # Save updated config to store
-    dynamic_room_config.append(room.dict())
+        # Save updated config to store
+        dynamic_room_config.append(room.dict())
 
     print("🔍 Saving full config:", room.dict())
 
     return {"status": f"Room {room.room_id} added."}
 
 def get_xknx_instance(room_id: str):
-    for room in room_instances:
-        if str(room.room_id) == str(room_id):
-            return room.xknx
-    return None
+    room = room_registry.get(room_id)
+    return room.xknx if room is not None else None
 
 
 async def _initialize_with_retry(
     instance: RoomKNX,
     retries: int = 3,
-    base_delay: float = 1.0
+    base_delay: float = 1.0,
+    timeout: float | None = None,
+    semaphore: asyncio.Semaphore | None = None,
 ) -> bool:
     """
     Try instance.initialize() up to `retries` times, with exponential backoff.
+    Each attempt is bounded by `timeout` seconds when given. With a
+    semaphore, each attempt holds a slot but the backoff does not, so a dead
+    gateway doesn't keep other rooms from connecting.
     Returns True on success, False on final failure.
     """
+    semaphore = semaphore or asyncio.Semaphore(1)
     for attempt in range(1, retries + 1):
-        try:
-            await instance.initialize()
-            logging.info(f"✅ Initialized room {instance.room_id} on attempt {attempt}")
-            return True
-        except Exception as e:
-            logging.warning(
-                f"⚠️  Init failed for room {instance.room_id} "
-                f"(attempt {attempt}/{retries}): {e}"
-            )
-            if attempt < retries:
-                await asyncio.sleep(base_delay * (2 ** (attempt - 1)))
+        async with semaphore:
+            try:
+                await asyncio.wait_for(instance.initialize(), timeout=timeout)
+                logging.info(f"✅ Initialized room {instance.room_id} on attempt {attempt}")
+                return True
+            except Exception as e:
+                reason = f"timed out after {timeout}s" if isinstance(e, asyncio.TimeoutError) else e
+                logging.warning(
+                    f"⚠️  Init failed for room {instance.room_id} "
+                    f"(attempt {attempt}/{retries}): {reason}"
+                )
+                # Release a half-open tunnel before retrying or giving up
+                await _disconnect_quietly(instance)
+        if attempt < retries:
+            await asyncio.sleep(base_delay * (2 ** (attempt - 1)))
     logging.error(f"❌ Giving up on room {instance.room_id} after {retries} attempts")
     return False
\ No newline at end of file
@@ -3,11 +3,15 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.responses import Response
 from app.routes import project_parser, knx_config, device_config, devices_runtime, knx_ws, knx_control_ws
 from knx_control import get_temperature_for_room
-from app.routes import knx_runtime
+from app.routes import knx_runtime, history
+from app.core.history_store import device_history_writer
+from app.core.temperature_feed import temperature_feeds
+from app.core.startup_restore import startup_restore
+from app.core.serialization import KNXJSONResponse, send_json
 import psutil
 import asyncio
 
-app = FastAPI()
+app = FastAPI(default_response_class=KNXJSONResponse)
 
 # ✅ Include API routers
 app.include_router(project_parser.router)
@@ -17,10 +21,25 @@ app.include_router(knx_runtime.router)
 app.include_router(devices_runtime.router)
 app.include_router(knx_ws.router)
 app.include_router(knx_control_ws.router)
+app.include_router(history.router)
 
 @app.on_event("startup")
 async def startup_event():
-    print("\U0001F680 IVCore backend is running. Awaiting runtime KNX configuration...")
+    print("\U0001F680 IVCore backend is running. Restoring saved KNX configuration in the background...")
+    await device_history_writer.start()
+    # Rooms connect and warm up behind the scenes; HTTP is available right away
+    startup_restore.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await startup_restore.stop()
+    await device_history_writer.stop()
+
+@app.get("/ready")
+def readiness():
+    """503 until the saved configuration is connected and warmed up; the body shows progress."""
+    status = startup_restore.status()
+    return KNXJSONResponse(status, status_code=200 if status["ready"] else 503)
 
 @app.get("/")
 def root():
@@ -50,10 +69,25 @@ def favicon():
 @app.websocket("/ws/temperature/{room_id}")
 async def websocket_temperature(websocket: WebSocket, room_id: int):
     await websocket.accept()
+    # One shared feed per room; this client only drains its queue
+    feed_room_id = str(room_id - 1)
+    outbox = temperature_feeds.subscribe(feed_room_id)
+
+    async def writer():
+        while True:
+            await send_json(websocket, await outbox.get())
+
+    writer_task = asyncio.create_task(writer())
     try:
         while True:
-            data = await get_temperature_for_room(room_id - 1)
-            await websocket.send_json(data)
-            await asyncio.sleep(3)
+            # Nothing is expected from the client; this just notices the disconnect
+            await websocket.receive_text()
     except WebSocketDisconnect:
-        print(f"🔌 WebSocket disconnected: Room {room_id}")
\ No newline at end of file
+        print(f"🔌 WebSocket disconnected: Room {room_id}")
+    finally:
+        writer_task.cancel()
+        temperature_feeds.unsubscribe(feed_room_id, outbox)
+
+@app.get("/ws/temperature/stats", tags=["Development"])
+def temperature_feed_stats():
+    return temperature_feeds.stats()
@@ -0,0 +1,133 @@
+# tests/test_ws_broadcaster.py
+import asyncio
+
+import orjson
+
+from app.core.ws_broadcaster import DeviceWebSocketBroadcaster
+from app.utils.device_state_resolvers.base import DeviceState
+
+
+class FakeDevice:
+    def __init__(self):
+        self.name = "Dimmer"
+        self.a = 0
+        self.b = 0
+
+
+class FakeState(DeviceState):
+    __slots__ = FIELDS = ("a", "b")
+
+    @staticmethod
+    def capabilities(device) -> dict:
+        return {"name": device.name}
+
+    def read(self, device) -> tuple:
+        return device.a, device.b
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send_text(self, text: str):
+        self.frames.append(orjson.loads(text))
+
+
+def client_view(frames: list[dict]) -> dict:
+    """What a client ends up with after applying the frames in order."""
+    view = {}
+    for frame in frames:
+        if "state" in frame:
+            view = dict(frame["state"])
+        else:
+            view.update(frame["changed"])
+    return view
+
+
+async def flush():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def publish(broadcaster, device, record, **values):
+    for field, value in values.items():
+        setattr(device, field, value)
+    record.refresh(device)
+    broadcaster.publish("r1", device.name, record)
+
+
+def test_dropped_delta_is_replaced_by_a_full_state():
+    async def run():
+        broadcaster = DeviceWebSocketBroadcaster(queue_size=2, policy="drop_oldest", delta=True)
+        ws = FakeWebSocket()
+        device = FakeDevice()
+        record = FakeState(device)
+        broadcaster.subscribe("r1", device.name, ws)
+
+        publish(broadcaster, device, record)
+        await flush()
+        # Queued behind a slow client: the third frame pushes out {"a": 1}
+        publish(broadcaster, device, record, a=1)
+        publish(broadcaster, device, record, b=1)
+        publish(broadcaster, device, record, b=2)
+        await flush()
+
+        assert [("state" in frame) for frame in ws.frames] == [True, True]
+        assert client_view(ws.frames) == {"name": "Dimmer", "a": 1, "b": 2}
+
+        # Back in sync: the next change goes out as a delta again
+        publish(broadcaster, device, record, b=3)
+        await flush()
+        assert ws.frames[-1]["changed"] == {"b": 3}
+        assert client_view(ws.frames) == {"name": "Dimmer", "a": 1, "b": 3}
+        assert broadcaster.stats()["resynced"] == 1
+        broadcaster.unsubscribe(ws)
+
+    asyncio.run(run())
+
+
+def test_rebuilt_record_starts_with_a_full_state():
+    async def run():
+        broadcaster = DeviceWebSocketBroadcaster(queue_size=8, policy="drop_oldest", delta=True)
+        ws = FakeWebSocket()
+        device = FakeDevice()
+        record = FakeState(device)
+        broadcaster.subscribe("r1", device.name, ws)
+        publish(broadcaster, device, record)
+        await flush()
+
+        device.a = 5
+        broadcaster.reset("r1", device.name)
+        publish(broadcaster, device, FakeState(device))
+        await flush()
+
+        assert "state" in ws.frames[-1]
+        assert client_view(ws.frames) == {"name": "Dimmer", "a": 5, "b": 0}
+        broadcaster.unsubscribe(ws)
+
+    asyncio.run(run())
+
+
+def test_resync_matches_the_deltas_that_follow():
+    async def run():
+        broadcaster = DeviceWebSocketBroadcaster(queue_size=1, policy="drop_oldest", delta=True)
+        ws = FakeWebSocket()
+        device = FakeDevice()
+        record = FakeState(device)
+        broadcaster.subscribe("r1", device.name, ws)
+
+        publish(broadcaster, device, record, a=10)
+        await flush()
+        publish(broadcaster, device, record, a=11)
+        publish(broadcaster, device, record, a=12)
+        # A read through get_device_state() moves the record ahead without a publish
+        device.a = 20
+        record.refresh(device)
+        await flush()
+        publish(broadcaster, device, record, a=12)
+        await flush()
+
+        assert client_view(ws.frames)["a"] == 12
+        broadcaster.unsubscribe(ws)
+
+    asyncio.run(run())